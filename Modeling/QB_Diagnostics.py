@@ -1,99 +1,205 @@
 import sqlite3
+from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
-conn = sqlite3.connect('c:/Users/carme/NFL_QB_Project/data_load/nfl_qb_data.db')
-df = pd.read_sql_query("SELECT * FROM qb_season_stats WHERE season = 2025", conn)
-conn.close()
-
-def normalize_feature(series, invert=False):
-    min_val = series.min()
-    max_val = series.max()
-    if max_val > min_val:
-        normalized = (series - min_val) / (max_val - min_val)
-        normalized = 50 + (normalized * 50)
-        if invert:
-            normalized = 150 - normalized
-        return normalized
-    else:
-        return pd.Series([75] * len(series), index=series.index)
+DB_PATH = Path('c:/Users/carme/NFL_QB_Project/data_load/nfl_qb_data.db')
+CACHE_DIR = Path(__file__).resolve().parent / 'cache'
+
+# Columns this script reads (rush_tds may be missing from older databases)
+USED_COLUMNS = [
+    'player_name', 'attempts', 'total_pass_epa', 'pass_success_rate', 'cpoe', 'total_wpa',
+    'high_leverage_epa', 'td_rate', 'third_down_success', 'red_zone_epa', 'completion_pct',
+    'turnover_rate', 'sack_rate', 'rush_yards_per_game', 'rush_attempts', 'rush_success_rate', 'rush_tds'
+]
+COUNT_COLUMNS = ['attempts', 'rush_attempts', 'rush_tds']
+
+# Query SQLite once per season and reuse a Parquet snapshot until the database file changes
+def load_season(season):
+    path = CACHE_DIR / f'qb_season_{season}.parquet'
+    db_mtime = DB_PATH.stat().st_mtime if DB_PATH.exists() else 0
+    if path.exists() and path.stat().st_mtime >= db_mtime:
+        columns = [col for col in USED_COLUMNS if col in pq.read_schema(path).names]
+        return pd.read_parquet(path, columns=columns)
+    
+    conn = sqlite3.connect(DB_PATH)
+    available = {row[1] for row in conn.execute("PRAGMA table_info(qb_season_stats)")}
+    columns = [col for col in USED_COLUMNS if col in available]
+    # Project only the columns used below and give pandas their dtypes up front instead of inferring them;
+    # counts stay inferred so a NULL can't break an int cast, and are downcast afterwards
+    dtype = {col: np.float32 for col in columns if col not in COUNT_COLUMNS}
+    dtype['player_name'] = 'string[pyarrow]'
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(columns)} FROM qb_season_stats WHERE season = ?", conn, params=(season,), dtype=dtype
+    )
+    conn.close()
+    
+    float_cols = df.select_dtypes('float64').columns
+    int_cols = df.select_dtypes('int64').columns
+    df = df.astype({**dict.fromkeys(float_cols, np.float32), **dict.fromkeys(int_cols, np.int32)})
+    
+    CACHE_DIR.mkdir(exist_ok=True)
+    df.to_parquet(path, compression='zstd')
+    return df
+
+df = load_season(2025)
+
+# Rating inputs, in the order of the component weights below; turnover and sack rate are inverted
+FEATURE_COLUMNS = [
+    'total_pass_epa', 'pass_success_rate', 'cpoe',
+    'total_wpa', 'high_leverage_epa', 'td_rate',
+    'third_down_success', 'red_zone_epa', 'completion_pct',
+    'turnover_rate', 'sack_rate'
+]
+INVERTED_COLUMNS = ['turnover_rate', 'sack_rate']
+
+def normalize_features(frame, invert):
+    # Scale every column to 50-100 in one broadcast; `invert` flags columns to flip, constant columns get 75
+    arr = frame.to_numpy(dtype=np.float64)
+    min_val = np.nanmin(arr, axis=0)
+    max_val = np.nanmax(arr, axis=0)
+    valid = max_val > min_val
+    normalized = (arr - min_val) * (50.0 / np.where(valid, max_val - min_val, 1.0)) + 50.0
+    normalized = np.where(invert, 150.0 - normalized, normalized)
+    normalized[:, ~valid] = 75.0
+    return normalized
+
+# Component weights: rows follow FEATURE_COLUMNS, columns follow COMPONENT_COLUMNS
+COMPONENT_COLUMNS = ['efficiency_score', 'impact_score', 'consistency_score', 'ball_security_score']
+COMPONENT_WEIGHTS = np.array([
+    [0.50, 0.00, 0.00, 0.00],  # total_pass_epa
+    [0.30, 0.00, 0.00, 0.00],  # pass_success_rate
+    [0.20, 0.00, 0.00, 0.00],  # cpoe
+    [0.00, 0.50, 0.00, 0.00],  # total_wpa
+    [0.00, 0.30, 0.00, 0.00],  # high_leverage_epa
+    [0.00, 0.20, 0.00, 0.00],  # td_rate
+    [0.00, 0.00, 0.40, 0.00],  # third_down_success
+    [0.00, 0.00, 0.35, 0.00],  # red_zone_epa
+    [0.00, 0.00, 0.25, 0.00],  # completion_pct
+    [0.00, 0.00, 0.00, 0.40],  # turnover_rate
+    [0.00, 0.00, 0.00, 0.60],  # sack_rate
+])
+RATING_WEIGHTS = np.array([0.40, 0.20, 0.20, 0.10])
 
 # Normalize all features
-df['total_pass_epa_norm'] = normalize_feature(df['total_pass_epa'])
-df['pass_success_rate_norm'] = normalize_feature(df['pass_success_rate'])
-df['cpoe_norm'] = normalize_feature(df['cpoe'])
-df['total_wpa_norm'] = normalize_feature(df['total_wpa'])
-df['high_leverage_epa_norm'] = normalize_feature(df['high_leverage_epa'])
-df['td_rate_norm'] = normalize_feature(df['td_rate'])
-df['third_down_success_norm'] = normalize_feature(df['third_down_success'])
-df['red_zone_epa_norm'] = normalize_feature(df['red_zone_epa'])
-df['completion_pct_norm'] = normalize_feature(df['completion_pct'])
-df['turnover_rate_norm'] = normalize_feature(df['turnover_rate'], invert=True)
-df['sack_rate_norm'] = normalize_feature(df['sack_rate'], invert=True)
-
-# Calculate component scores
-efficiency_score = (0.50 * df['total_pass_epa_norm'] + 0.30 * df['pass_success_rate_norm'] + 0.20 * df['cpoe_norm'])
-impact_score = (0.50 * df['total_wpa_norm'] + 0.30 * df['high_leverage_epa_norm'] + 0.20 * df['td_rate_norm'])
-consistency_score = (0.40 * df['third_down_success_norm'] + 0.35 * df['red_zone_epa_norm'] + 0.25 * df['completion_pct_norm'])
-ball_security_score = (0.40 * df['turnover_rate_norm'] + 0.60 * df['sack_rate_norm'])
-
-df['custom_rating'] = (0.40 * efficiency_score + 0.20 * impact_score + 0.20 * consistency_score + 0.10 * ball_security_score).clip(50, 100)
-
-# Store component scores in dataframe
-df['efficiency_score'] = efficiency_score
-df['impact_score'] = impact_score
-df['consistency_score'] = consistency_score
-df['ball_security_score'] = ball_security_score
+normalized = normalize_features(df[FEATURE_COLUMNS], np.isin(FEATURE_COLUMNS, INVERTED_COLUMNS))
+df[[f'{col}_norm' for col in FEATURE_COLUMNS]] = normalized
+
+# Calculate the four component scores, each from only its own features so a missing value
+# (NaN) elsewhere can't leak in through a zero weight, then the weighted rating
+components = np.column_stack([normalized[:, w > 0] @ w[w > 0] for w in COMPONENT_WEIGHTS.T])
+df[COMPONENT_COLUMNS] = components
+df['custom_rating'] = np.clip(components @ RATING_WEIGHTS, 50, 100)
+
+# Rank = 1 + number of QBs rated strictly higher (ties share the best rank); computed once for all lookups
+df['rank'] = df['custom_rating'].rank(method='min', ascending=False).fillna(1).astype(int)
 
 # QBs to analyze
 qbs_to_analyze = ['J.Herbert', 'B.Mayfield', 'J.Dart', 'J.Allen']
 
+# Row position of each QB (first row if a name repeats): hash lookups instead of column scans
+name_to_idx = {}
+for idx, name in enumerate(df['player_name']):
+    name_to_idx.setdefault(name, idx)
+analyzed_idx = [name_to_idx[qb_name] for qb_name in qbs_to_analyze if qb_name in name_to_idx]
+
 print("=" * 100)
 print("2025 QB ANALYSIS: Why Are They Ranking Lower?")
 print("=" * 100)
 
 # First show where they rank overall
-df_sorted = df.sort_values('custom_rating', ascending=False).reset_index(drop=True)
+# Stable sort: tied ratings keep row order (as nlargest does), so the Top 5 below can reuse it
+df_sorted = df.sort_values('custom_rating', ascending=False, kind='stable').reset_index(drop=True)
 print("\n2025 Overall Rankings (Top 15):")
+top15 = df_sorted.head(15)
+top15_table = pd.DataFrame({
+    'Rank': np.arange(1, len(top15) + 1),
+    'QB': top15['player_name'],
+    'Rating': top15['custom_rating'],
+    'EPA': top15['total_pass_epa'],
+    'Success%': top15['pass_success_rate'],
+    'TD%': top15['td_rate'],
+    'TO%': top15['turnover_rate'],
+    'Sack%': top15['sack_rate'],
+})
+# Fixed-width formatters reproduce the original row layout in one call; the header keeps its own
+# (wider) column widths, so it is printed separately rather than by to_string
 print(f"{'Rank':<5} {'QB':<20} {'Rating':>7} {'EPA':>8} {'Success%':>9} {'TD%':>6} {'TO%':>6} {'Sack%':>7}")
 print("-" * 100)
-for idx in range(min(15, len(df_sorted))):
-    qb = df_sorted.iloc[idx]
-    print(f"{idx+1:<5} {qb['player_name']:<20} {qb['custom_rating']:>7.1f} {qb['total_pass_epa']:>8.1f} {qb['pass_success_rate']:>8.1%} "
-          f"{qb['td_rate']:>6.1%} {qb['turnover_rate']:>6.1%} {qb['sack_rate']:>6.1%}")
+print(top15_table.to_string(
+    index=False,
+    header=False,
+    formatters={
+        'Rank': '{:<5}'.format,
+        'QB': '{:<20}'.format,
+        'Rating': '{:>7.1f}'.format,
+        'EPA': '{:>8.1f}'.format,
+        'Success%': '{:>8.1%}'.format,
+        'TD%': '{:>6.1%}'.format,
+        'TO%': '{:>6.1%}'.format,
+        'Sack%': '{:>6.1%}'.format,
+    }
+))
 
 print("\n" + "=" * 100)
 print("QBs OF INTEREST:")
 print("=" * 100)
-for qb_name in qbs_to_analyze:
-    qb_row = df[df['player_name'] == qb_name]
-    if len(qb_row) > 0:
-        qb = qb_row.iloc[0]
-        rank = (df['custom_rating'] > qb['custom_rating']).sum() + 1
-        print(f"{qb_name:<20} Rating: {qb['custom_rating']:>5.1f}  Rank: {rank:>2}/{len(df)}")
+for idx in analyzed_idx:
+    qb = df.iloc[idx]
+    rank = int(qb['rank'])
+    print(f"{qb['player_name']:<20} Rating: {qb['custom_rating']:>5.1f}  Rank: {rank:>2}/{len(df)}")
 
 print("\n" + "=" * 100)
 print("RUSHING STATS COMPARISON")
 print("=" * 100)
+rushing = df.iloc[analyzed_idx]
+rushing_table = pd.DataFrame({
+    'QB': rushing['player_name'].to_numpy(),
+    'Rush Y/G': rushing['rush_yards_per_game'].to_numpy(),
+    'Rush Att': rushing['rush_attempts'].to_numpy(),
+    'Rush Succ%': rushing['rush_success_rate'].to_numpy(),
+    'Rush TDs': rushing['rush_tds'].to_numpy() if 'rush_tds' in rushing else 0,
+})
 print(f"{'QB':<20} {'Rush Y/G':>10} {'Rush Att':>10} {'Rush Succ%':>12} {'Rush TDs':>10}")
 print("-" * 100)
-for qb_name in qbs_to_analyze:
-    qb_row = df[df['player_name'] == qb_name]
-    if len(qb_row) > 0:
-        qb = qb_row.iloc[0]
-        rush_tds = qb.get('rush_tds', 0)
-        print(f"{qb_name:<20} {qb['rush_yards_per_game']:>10.1f} {qb['rush_attempts']:>10.0f} "
-              f"{qb['rush_success_rate']:>11.1%} {rush_tds:>10.0f}")
+print(rushing_table.to_string(
+    index=False,
+    header=False,
+    formatters={
+        'QB': '{:<20}'.format,
+        'Rush Y/G': '{:>10.1f}'.format,
+        'Rush Att': '{:>10.0f}'.format,
+        'Rush Succ%': '{:>11.1%}'.format,
+        'Rush TDs': '{:>10.0f}'.format,
+    }
+))
+
+metrics = [
+    ('Pass EPA', 'total_pass_epa', False),
+    ('Success Rate', 'pass_success_rate', False),
+    ('CPOE', 'cpoe', False),
+    ('WPA', 'total_wpa', False),
+    ('TD Rate', 'td_rate', False),
+    ('3rd Down Success', 'third_down_success', False),
+    ('Red Zone EPA', 'red_zone_epa', False),
+    ('Turnover Rate', 'turnover_rate', True),
+    ('Sack Rate', 'sack_rate', True),
+]
+
+# Percentile of every QB on every metric, ranked once per column:
+# share of QBs at or below the value (at or above for inverted metrics)
+percentile_table = pd.DataFrame({
+    col: df[col].rank(method='max', ascending=not invert).fillna(0) / len(df) * 100
+    for _, col, invert in metrics
+})
 
 # Detailed analysis for each QB
-for qb_name in qbs_to_analyze:
-    qb_row = df[df['player_name'] == qb_name]
-    if len(qb_row) == 0:
-        continue
-    
-    qb = qb_row.iloc[0]
+for idx in analyzed_idx:
+    qb = df.iloc[idx]
+    qb_name = qb['player_name']
     qb_idx = qb.name
-    rank = (df['custom_rating'] > qb['custom_rating']).sum() + 1
+    rank = int(qb['rank'])
     
     print("\n" + "=" * 100)
     print(f"{qb_name} DETAILED BREAKDOWN")
@@ -108,24 +214,9 @@ for qb_name in qbs_to_analyze:
     print(f"  Ball Security (10%):   {qb['ball_security_score']:>5.1f}")
     
     print("\nKEY METRICS & PERCENTILES:")
-    metrics = [
-        ('Pass EPA', 'total_pass_epa', False),
-        ('Success Rate', 'pass_success_rate', False),
-        ('CPOE', 'cpoe', False),
-        ('WPA', 'total_wpa', False),
-        ('TD Rate', 'td_rate', False),
-        ('3rd Down Success', 'third_down_success', False),
-        ('Red Zone EPA', 'red_zone_epa', False),
-        ('Turnover Rate', 'turnover_rate', True),
-        ('Sack Rate', 'sack_rate', True),
-    ]
-    
     for metric_name, col, invert in metrics:
         value = qb[col]
-        if invert:
-            percentile = (df[col] >= value).sum() / len(df) * 100
-        else:
-            percentile = (df[col] <= value).sum() / len(df) * 100
+        percentile = percentile_table.at[qb_idx, col]
         
         flag = "🔴" if percentile < 40 else "🟡" if percentile < 60 else ""
         if metric_name in ['Success Rate', 'CPOE']:
@@ -140,28 +231,40 @@ print("\n" + "=" * 100)
 print("COMMON PATTERNS & WEAKNESSES")
 print("=" * 100)
 
-analyzed_qbs = df[df['player_name'].isin(qbs_to_analyze)].copy()
+analyzed_qbs = df.iloc[analyzed_idx]
 
 print(f"\nAnalyzing {len(analyzed_qbs)} QBs: {', '.join(qbs_to_analyze)}")
 print("\nAverage Component Scores vs Top 5:")
-print(f"{'Metric':<25} {'These QBs':>12} {'Top 5':>12} {'Difference':>12}")
-print("-" * 100)
 
-top5 = df.nlargest(5, 'custom_rating')
-
-components = [
-    ('Custom Rating', 'custom_rating'),
-    ('Efficiency Score', 'efficiency_score'),
-    ('Impact Score', 'impact_score'),
-    ('Consistency Score', 'consistency_score'),
-    ('Ball Security Score', 'ball_security_score'),
-]
+top5 = df_sorted.head(5)
 
-for comp_name, comp_col in components:
-    avg_analyzed = analyzed_qbs[comp_col].mean()
-    avg_top5 = top5[comp_col].mean()
-    diff = avg_analyzed - avg_top5
-    print(f"{comp_name:<25} {avg_analyzed:>12.1f} {avg_top5:>12.1f} {diff:>+12.1f}")
+component_labels = {
+    'custom_rating': 'Custom Rating',
+    'efficiency_score': 'Efficiency Score',
+    'impact_score': 'Impact Score',
+    'consistency_score': 'Consistency Score',
+    'ball_security_score': 'Ball Security Score',
+}
+comp_cols = list(component_labels)
+summary = pd.DataFrame({
+    'Metric': list(component_labels.values()),
+    'These QBs': analyzed_qbs[comp_cols].mean().to_numpy(),
+    'Top 5': top5[comp_cols].mean().to_numpy(),
+})
+summary['Difference'] = summary['These QBs'] - summary['Top 5']
+header, rows = summary.to_string(
+    index=False,
+    header=[f"{'Metric':<25}", 'These QBs', 'Top 5', 'Difference'],
+    formatters={
+        'Metric': '{:<25}'.format,
+        'These QBs': '{:>12.1f}'.format,
+        'Top 5': '{:>12.1f}'.format,
+        'Difference': '{:>+12.1f}'.format,
+    }
+).split('\n', 1)
+print(header)
+print("-" * 100)
+print(rows)
 
 print("\n" + "-" * 100)
 print("Average Percentiles for Key Metrics:")
@@ -179,16 +282,7 @@ key_metrics = [
 ]
 
 for metric_name, col, invert in key_metrics:
-    percentiles = []
-    for _, qb in analyzed_qbs.iterrows():
-        value = qb[col]
-        if invert:
-            pct = (df[col] >= value).sum() / len(df) * 100
-        else:
-            pct = (df[col] <= value).sum() / len(df) * 100
-        percentiles.append(pct)
-    
-    avg_pct = np.mean(percentiles)
+    avg_pct = percentile_table.loc[analyzed_qbs.index, col].mean()
     
     if avg_pct < 35:
         assessment = "CRITICAL WEAKNESS"
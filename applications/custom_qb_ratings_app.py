@@ -1,176 +1,418 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
 from pathlib import Path
-import sys
-import subprocess
 
 # --- Archetype Assignment Logic ---
-def get_level(val):
-    """Classify rating value into tier."""
-    if val >= 93:
-        return 'elite'
-    elif val >= 85:
-        return 'strong'
-    elif val >= 72:
-        return 'solid'
-    else:
-        return 'developing'
+# Rating tiers as integers: developing < 72 <= solid < 85 <= strong < 93 <= elite
+TIER_BOUNDS = np.array([72, 85, 93])
+DEVELOPING, SOLID, STRONG, ELITE = range(4)
 
-def assign_custom_archetype(row):
-    """Assign QB archetype based on playstyle rating strengths."""
-    # Map to trait names
-    trait_style_map = {
-        'mobility_rating': 'Mobility',
-        'aggression_rating': 'Aggression',
-        'accuracy_rating': 'Accuracy',
-        'ball_security_rating': 'Protective',
-        'pocket_presence_rating': 'Poise',
-        'playmaking_rating': 'Playmaking',
-    }
+# Playstyle rating columns and the trait name each one maps to (column order breaks ties)
+PLAYSTYLE_RATING_COLS = [
+    'mobility_rating', 'aggression_rating', 'accuracy_rating',
+    'ball_security_rating', 'pocket_presence_rating', 'playmaking_rating',
+]
+TRAIT_NAMES = np.array(['Mobility', 'Aggression', 'Accuracy', 'Protective', 'Poise', 'Playmaking'])
+
+# Every cut-off the top-two-trait rules compare against; a rating's level is its bin among these
+ARCHETYPE_CUTOFFS = np.array([73, 82, 92, 93])
+
+def classify_top_two(name1, val1, name2, val2):
+    """Archetype from the two strongest traits and their ratings (arrays; first matching rule wins)."""
+    protective_elite = (name1 == 'Protective') & (val1 >= 93)
+    playmaking_top = name1 == 'Playmaking'
     
-    ratings = [
-        ('mobility_rating', row['mobility_rating']),
-        ('aggression_rating', row['aggression_rating']),
-        ('accuracy_rating', row['accuracy_rating']),
-        ('ball_security_rating', row['ball_security_rating']),
-        ('pocket_presence_rating', row['pocket_presence_rating']),
-        ('playmaking_rating', row['playmaking_rating']),
+    rules = [
+        # Special archetypes - check ball security first if it's elite (93+)
+        protective_elite & (name2 == 'Accuracy') & (val2 >= 82), 'Efficient Ball Protector',
+        protective_elite & (name2 == 'Mobility') & (val2 >= 82), 'Safe Ball Handler',
+        protective_elite & (name2 == 'Aggression') & (val2 >= 82), 'Aggressive Ball Protector',
+        protective_elite, 'Ball Protector',
+        
+        (name1 == 'Mobility') & (val1 >= 82), 'Dynamic Rusher',
+        (name1 == 'Accuracy') & (val1 >= 82), 'Precision Passer',
+        (name1 == 'Aggression') & (val1 >= 82), 'Gunslinger',
+        (name1 == 'Poise') & (val1 >= 82), 'Pressure Resistant',
+        
+        # If playmaking is highest, use second trait instead
+        playmaking_top & (name2 == 'Aggression') & (val2 >= 82), 'Gunslinger',
+        playmaking_top & (name2 == 'Accuracy') & (val2 >= 82), 'Precision Passer',
+        playmaking_top & (name2 == 'Mobility') & (val2 >= 82), 'Dynamic Rusher',
+        playmaking_top, 'Efficient Passer',
+        
+        # Combo archetypes
+        (name1 == 'Accuracy') & (name2 == 'Protective') & (val1 >= 73) & (val2 >= 92), 'Steady Accurate Passer',
+        (name1 == 'Aggression') & (name2 == 'Accuracy') & (val1 >= 73) & (val2 >= 73), 'Aggressive Precision Passer',
+        
+        # Protective top trait below 93: redirect to generic archetypes based on second trait
+        (name1 == 'Protective') & (name2 == 'Accuracy'), 'Accurate Passer',
+        (name1 == 'Protective') & (name2 == 'Mobility'), 'Mobile Passer',
+        (name1 == 'Protective') & (name2 == 'Aggression'), 'Aggressive Passer',
+        name1 == 'Protective', 'Poised Passer',
+        
+        # Default: use top trait and style
+        name1 == 'Aggression', 'Aggressive Passer',
+        name1 == 'Accuracy', 'Accurate Passer',
+        name1 == 'Mobility', 'Mobile Passer',
+        name1 == 'Poise', 'Poised Passer',
     ]
-    ratings_sorted = sorted(ratings, key=lambda x: x[1], reverse=True)
-    (trait1, val1), (trait2, val2), (trait3, val3) = ratings_sorted[0], ratings_sorted[1], ratings_sorted[2]
-    level1 = get_level(val1)
-    level2 = get_level(val2)
-    name1 = trait_style_map[trait1]
-    name2 = trait_style_map[trait2]
-    
-    # Well-rounded/All-Around logic (make less likely)
-    good_traits = sum([v >= 77 for _, v in ratings])
-    elite_traits = sum([v >= 93 for _, v in ratings])
-    strong_traits = sum([v >= 85 for _, v in ratings])
-    if good_traits == 6 and elite_traits == 0:
-        return 'All-Around Threat'
-    if strong_traits == 6:
-        return 'Complete All-Around'
-    
-    # Special archetypes - check ball security first if it's elite (93+)
-    if name1 == 'Protective' and val1 >= 93:
-        if name2 == 'Accuracy' and val2 >= 82:
-            return 'Efficient Ball Protector'
-        elif name2 == 'Mobility' and val2 >= 82:
-            return 'Safe Ball Handler'
-        elif name2 == 'Aggression' and val2 >= 82:
-            return 'Aggressive Ball Protector'
-        else:
-            return 'Ball Protector'
-    
-    if name1 == 'Mobility' and val1 >= 82:
-        return 'Dynamic Rusher'
-    if name1 == 'Accuracy' and val1 >= 82:
-        return 'Precision Passer'
-    if name1 == 'Aggression' and val1 >= 82:
-        return 'Gunslinger'
-    if name1 == 'Mobility' and name2 == 'Protective' and val1 >= 82 and val2 >= 93:
-        return 'Safe Ball Handler'
-    if name1 == 'Poise' and val1 >= 82:
-        return 'Pressure Resistant'
-    
-    # If playmaking is highest, use second trait instead
-    if name1 == 'Playmaking':
-        if name2 == 'Aggression' and val2 >= 82:
-            return 'Gunslinger'
-        elif name2 == 'Accuracy' and val2 >= 82:
-            return 'Precision Passer'
-        elif name2 == 'Mobility' and val2 >= 82:
-            return 'Dynamic Rusher'
-        elif name2 == 'Protective' and val2 >= 85:
-            return 'Efficient Passer'
-        else:
-            return 'Efficient Passer'
-    
-    # Combo archetypes
-    if name1 == 'Accuracy' and name2 == 'Protective' and val1 >= 73 and val2 >= 92:
-        return 'Steady Accurate Passer'
-    if name1 == 'Aggression' and name2 == 'Accuracy' and val1 >= 73 and val2 >= 73:
-        return 'Aggressive Precision Passer'
-    
-    # Default: use top trait and style, but avoid awkward combos
-    if name1 == 'Protective':
-        # Only allow Ball Protector archetype for extremely high ratings (95+)
-        if val1 >= 95:
-            if name2 == 'Mobility':
-                return 'Safe Ball Handler'
-            if name2 == 'Accuracy':
-                return 'Efficient Ball Protector'
-        # Otherwise redirect to generic archetypes based on second trait
-        if name2 == 'Accuracy':
-            return 'Accurate Passer'
-        elif name2 == 'Mobility':
-            return 'Mobile Passer'
-        elif name2 == 'Aggression':
-            return 'Aggressive Passer'
-        else:
-            return 'Poised Passer'
-    if name1 == 'Aggression':
-        return 'Aggressive Passer'
-    if name1 == 'Accuracy':
-        return 'Accurate Passer'
-    if name1 == 'Mobility':
-        return 'Mobile Passer'
-    if name1 == 'Poise':
-        return 'Poised Passer'
-    # Final fallback
-    return f"Balanced Passer" if name1 == 'Protective' else f"Efficient Passer"
+    return np.select(rules[0::2], rules[1::2], default='Efficient Passer')
+
+def build_archetype_table():
+    """Decision table indexed by (trait1, level1, trait2, level2), evaluated once at each level's floor rating."""
+    shape = (len(TRAIT_NAMES), len(ARCHETYPE_CUTOFFS) + 1) * 2
+    trait1, level1, trait2, level2 = np.indices(shape).reshape(4, -1)
+    level_floor = np.concatenate([[0], ARCHETYPE_CUTOFFS])
+    return classify_top_two(
+        TRAIT_NAMES[trait1], level_floor[level1], TRAIT_NAMES[trait2], level_floor[level2]
+    ).reshape(shape)
+
+ARCHETYPE_TABLE = build_archetype_table()
+
+def assign_custom_archetypes(df):
+    """Assign QB archetypes based on playstyle rating strengths, for every row at once."""
+    ratings = df[PLAYSTYLE_RATING_COLS].to_numpy(dtype=np.float64)
+    
+    # Top two traits per row (a stable sort keeps the first column on ties) and their rule levels
+    top_two = np.argsort(-ratings, axis=1, kind='stable')[:, :2]
+    levels = np.searchsorted(ARCHETYPE_CUTOFFS, ratings, side='right')
+    trait1, trait2 = top_two.T
+    level1, level2 = np.take_along_axis(levels, top_two, axis=1).T
+    archetype = ARCHETYPE_TABLE[trait1, level1, trait2, level2]
+    
+    # Well-rounded/All-Around logic (make less likely) takes precedence over the top-two table
+    tiers = np.searchsorted(TIER_BOUNDS, ratings, side='right')
+    good_traits = (ratings >= 77).sum(axis=1)
+    elite_traits = (tiers == ELITE).sum(axis=1)
+    strong_traits = (tiers >= STRONG).sum(axis=1)
+    return np.select(
+        [(good_traits == 6) & (elite_traits == 0), strong_traits == 6],
+        ['All-Around Threat', 'Complete All-Around'],
+        default=archetype
+    )
 
 # --- Load Data ---
+RATINGS_CSV = Path('modeling/models/custom_qb_ratings.csv')
+COMPOSITE_CSV = Path('modeling/models/qb_composite_ratings.csv')
+RATINGS_CACHE_DIR = Path('modeling/models/_cache')
+
+# Key columns are typed up front; everything else is numeric and parsed as float by the pyarrow reader
+KEY_DTYPES = {'player_name': 'string', 'player_id': 'string', 'season': 'int16'}
+COMPOSITE_COLS = ['player_id', 'season', 'composite_rating', 'predicted_qbr', 'predicted_elo']
+CATEGORY_COLS = ['player_name', 'display_name', 'player_id', 'archetype']
+
+# Bumped whenever build_ratings_frame changes its output, so stale sidecars are rebuilt
+RATINGS_CACHE_VERSION = 3
+
+def ratings_source(csv_path):
+    """Prefer the Parquet copy written by the modeling notebooks; fall back to the CSV."""
+    parquet_path = csv_path.with_suffix('.parquet')
+    return parquet_path if parquet_path.exists() else csv_path
+
+def read_ratings_table(csv_path, columns=None):
+    """Read a ratings file (Parquet if present, else CSV) with typed key columns."""
+    source = ratings_source(csv_path)
+    if source.suffix == '.parquet':
+        df = pd.read_parquet(source, columns=columns)
+        return df.astype({col: dtype for col, dtype in KEY_DTYPES.items() if col in df.columns})
+    return pd.read_csv(
+        source, usecols=columns, dtype={col: dtype for col, dtype in KEY_DTYPES.items() if columns is None or col in columns},
+        engine='pyarrow'
+    )
+
+def build_ratings_frame():
+    """Merge custom and composite ratings and derive yards per attempt, display name and archetype."""
+    # Load custom ratings
+    df = read_ratings_table(RATINGS_CSV)
+    
+    # Remove duplicates - keep the entry with more attempts for each player_id + season combination
+    df = df.loc[df.groupby(['player_id', 'season'], sort=False)['attempts'].idxmax()]
+    
+    # Load composite ratings from ML model
+    composite_df = read_ratings_table(COMPOSITE_CSV, columns=COMPOSITE_COLS)
+    
+    # Merge composite ratings
+    df = df.merge(composite_df, on=['player_id', 'season'], how='left')
+    
+    # Calculate yards per attempt from CSV data (no database needed for cloud deployment)
+    # Seasons with no recorded attempts get the 7.0 fallback instead of inf/NaN
+    if 'pass_yards_per_game' in df.columns and 'attempts' in df.columns:
+        attempts = df['attempts'].to_numpy(dtype=np.float64)
+        df['yards_per_attempt'] = np.where(
+            attempts > 0, df['pass_yards_per_game'].to_numpy(dtype=np.float64) * 17.0 / np.maximum(attempts, 1), 7.0
+        )
+    else:
+        df['yards_per_attempt'] = 7.0  # Fallback
+    
+    # Use player_name from CSV as display name
+    df['display_name'] = df['player_name']
+    
+    # Calculate archetypes
+    df['archetype'] = assign_custom_archetypes(df)
+    
+    # Downcast once after classification: float32 ratings halve downstream scan bandwidth,
+    # categorical name/id/archetype columns make the repeated groupby/isin calls compare integer codes
+    rating_cols = [col for col in df.columns if col.endswith('_rating')]
+    df[rating_cols] = df[rating_cols].astype('float32')
+    df = df.astype({col: 'category' for col in CATEGORY_COLS})
+    
+    # Newest season first, so select_seasons can slice season blocks instead of scanning with isin
+    return df.sort_values('season', ascending=False, kind='stable', ignore_index=True)
+
 @st.cache_data
 def load_data():
     """Load QB ratings data from CSV files (optimized for cloud deployment)."""
     try:
-        # Load custom ratings
-        df = pd.read_csv('modeling/models/custom_qb_ratings.csv')
-        
-        # Remove duplicates - keep the entry with more attempts for each player_id + season combination
-        df = df.sort_values('attempts', ascending=False).drop_duplicates(subset=['player_id', 'season'], keep='first')
-        
-        # Load composite ratings from ML model
-        composite_df = pd.read_csv('modeling/models/qb_composite_ratings.csv')
-        composite_df = composite_df[['player_id', 'season', 'composite_rating', 'predicted_qbr', 'predicted_elo']]
-        
-        # Merge composite ratings
-        df = df.merge(composite_df, on=['player_id', 'season'], how='left')
-        
-        # Calculate yards per attempt from CSV data (no database needed for cloud deployment)
-        if 'pass_yards_per_game' in df.columns and 'attempts' in df.columns:
-            df['yards_per_attempt'] = (df['pass_yards_per_game'] * 17.0) / df['attempts']
+        # Reuse the processed frame from a Parquet sidecar until either source file changes (mtime + size)
+        sources = [ratings_source(RATINGS_CSV), ratings_source(COMPOSITE_CSV)]
+        key = '_'.join(f"{stat.st_mtime_ns}_{stat.st_size}" for stat in (path.stat() for path in sources))
+        cache_path = RATINGS_CACHE_DIR / f'qb_ratings_v{RATINGS_CACHE_VERSION}_{key}.parquet'
+        if cache_path.exists():
+            df = pd.read_parquet(cache_path)
         else:
-            df['yards_per_attempt'] = 7.0  # Fallback
-        
-        # Use player_name from CSV as display name
-        df['display_name'] = df['player_name']
-        
-        # Calculate archetypes
-        df['archetype'] = df.apply(assign_custom_archetype, axis=1)
+            df = build_ratings_frame()
+            try:
+                RATINGS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                for stale in RATINGS_CACHE_DIR.glob('qb_ratings_*.parquet'):
+                    stale.unlink()
+                df.to_parquet(cache_path, compression='zstd')
+            except OSError:
+                pass  # Read-only deployments just rebuild on the next cold start
         
         # For last refresh, use CSV file modification time
-        last_refresh = None
-        csv_path = Path('modeling/models/custom_qb_ratings.csv')
-        if csv_path.exists():
-            import os
-            from datetime import datetime
-            mtime = os.path.getmtime(csv_path)
-            last_refresh = datetime.fromtimestamp(mtime).isoformat()
+        from datetime import datetime
+        last_refresh = datetime.fromtimestamp(RATINGS_CSV.stat().st_mtime).isoformat()
         
-        return df, last_refresh
+        # Widget options shared by several tabs, sorted once here instead of on every rerun
+        all_years = sorted(df['season'].unique(), reverse=True)
+        all_qbs = sorted(df['display_name'].unique())
+        
+        return df, last_refresh, all_years, all_qbs
         
     except Exception as e:
         st.error(f"Error loading data: {e}")
         raise
 
+def select_seasons(df, selected_years):
+    """Rows of `selected_years` in frame order, located by binary search on the newest-first season column."""
+    seasons = df['season'].to_numpy()[::-1]  # ascending view, no copy
+    years = np.sort(np.asarray(selected_years, dtype=seasons.dtype))[::-1]
+    starts = len(seasons) - np.searchsorted(seasons, years, side='right')
+    stops = len(seasons) - np.searchsorted(seasons, years, side='left')
+    rows = [np.arange(start, stop) for start, stop in zip(starts, stops)]
+    return df.iloc[np.concatenate(rows) if rows else []]
+
+# --- Tab 1: Current QB Rankings ---
+@st.cache_data
+def compute_current_rankings(df):
+    """Rank 2024-25 QBs by recent (70%) + career (30%) rating; independent of the Tab 1 filter widgets."""
+    # Define current players as those who played in 2024 or 2025
+    current_seasons = [2024, 2025]
+    player_codes = df['player_name'].cat.codes.to_numpy()
+    current_players = np.unique(player_codes[df['season'].isin(current_seasons).to_numpy()])
+    current_df = df[np.isin(player_codes, current_players)].copy()
+    
+    # Calculate weighted rating for each QB in one grouped pass
+    season = current_df['season']
+    is_recent = season.isin(current_seasons)
+    is_last_3 = ~is_recent & (season >= 2021)
+    is_older = season < 2021
+    rating = current_df['custom_rating']
+    
+    # Per-QB sums and counts of custom_rating for each window -> window means (NaN when empty)
+    windows = pd.DataFrame({
+        'recent_sum': rating.where(is_recent, 0), 'recent_n': is_recent,
+        'last_3_sum': rating.where(is_last_3, 0), 'last_3_n': is_last_3,
+        'older_sum': rating.where(is_older, 0), 'older_n': is_older,
+    }).groupby(current_df['player_name'], sort=False, observed=True).sum()
+    recent_rating = windows['recent_sum'] / windows['recent_n']
+    last_3_rating = windows['last_3_sum'] / windows['last_3_n']
+    older_rating = windows['older_sum'] / windows['older_n']
+    
+    # Career performance (30% weight): last 3 years 70% / older 30% when both exist, else whichever exists
+    historical_rating = (last_3_rating * 0.7 + older_rating * 0.3).fillna(last_3_rating).fillna(older_rating)
+    
+    # Recent performance (70% weight); no historical data means rookie/new player - use only recent
+    weighted_rating = (recent_rating * 0.70 + historical_rating * 0.30).fillna(recent_rating)
+    
+    # Most recent season row per QB for its season and playstyle attributes
+    latest = current_df.sort_values('season', kind='stable').groupby('player_name', sort=False, observed=True).tail(1).set_index('player_name')
+    career = current_df.groupby('player_name', sort=False, observed=True).agg(
+        career_rating=('custom_rating', 'mean'),
+        seasons_played=('season', 'nunique'),
+        first_season=('season', 'min'),
+        last_season=('season', 'max'),
+        total_attempts=('attempts', 'sum'),
+    )
+    
+    rankings = pd.DataFrame({
+        'weighted_rating': weighted_rating,
+        'recent_rating': recent_rating,
+        'career_rating': career['career_rating'],
+        'latest_season': latest['season'],
+        'seasons_played': career['seasons_played'],
+        'first_season': career['first_season'],
+        'last_season': career['last_season'],
+        'total_attempts': career['total_attempts'],
+        'archetype': latest['archetype'],
+        'mobility': latest['mobility_rating'],
+        'aggression': latest['aggression_rating'],
+        'accuracy': latest['accuracy_rating'],
+        'ball_security': latest['ball_security_rating'],
+        'pocket_presence': latest['pocket_presence_rating'],
+        'playmaking': latest['playmaking_rating'],
+    }).rename_axis('player_name').reset_index()
+    
+    # Create rankings dataframe
+    rankings_df = rankings.sort_values('weighted_rating', ascending=False).reset_index(drop=True)
+    rankings_df['rank'] = range(1, len(rankings_df) + 1)
+    return rankings_df
+
+# --- Tab 3: Player Career Ratings Table ---
+@st.cache_data(show_spinner=False)
+def season_rank_lookup(df):
+    """Map (season, player_id) to the QB's rank by custom_rating within that season."""
+    ranks = df.groupby('season')['custom_rating'].rank(ascending=False, method='min')
+    return dict(zip(zip(df['season'], df['player_id']), ranks))
+
+@st.cache_data(show_spinner=False)
+def player_career_table(df, player):
+    """One row per season for `player`, with the season rank by custom_rating."""
+    player_df = df[df['display_name'] == player].sort_values('season')
+    
+    # Ensure no duplicates in player_df before processing
+    player_df = player_df.drop_duplicates(subset=['season', 'player_id'], keep='first').reset_index(drop=True)
+    
+    # Look up each season's rank instead of re-ranking those seasons for every player
+    rank_lookup = season_rank_lookup(df)
+    player_df['Rank'] = pd.MultiIndex.from_frame(player_df[['season', 'player_id']]).map(rank_lookup)
+    return player_df
+
+# --- Tabs 4-7: Season Aggregations (cached per selected seasons) ---
+@st.cache_data(show_spinner=False)
+def component_scores_table(df, selected_years):
+    """Top 32 QBs by custom rating with component scores, averaged per QB when several seasons are selected."""
+    filtered_df = select_seasons(df, selected_years)
+    
+    # If multiple years, aggregate
+    if len(selected_years) > 1:
+        agg_dict = {
+            'custom_rating': 'mean',
+            'efficiency_score': 'mean',
+            'impact_score': 'mean',
+            'consistency_score': 'mean',
+            'volume_score': 'mean',
+            'ball_security_score': 'mean',
+            'pressure_score': 'mean',
+            'display_name': 'first'
+        }
+        display_df = filtered_df.groupby('player_name', as_index=False, observed=True).agg(agg_dict)
+    else:
+        display_df = filtered_df
+    
+    # Sort by custom rating
+    display_df = display_df.sort_values('custom_rating', ascending=False).head(32).reset_index(drop=True)
+    display_df['Rank'] = display_df.index + 1
+    return display_df
+
+@st.cache_data(show_spinner=False)
+def aggregate_qb_seasons(df, selected_years, agg_dict):
+    """Aggregate `agg_dict` per QB over the selected seasons, keeping QBs with 225+ attempts per season on average."""
+    filtered_df = select_seasons(df, selected_years)
+    
+    # Group by player and aggregate
+    agg_df = filtered_df.groupby('display_name', observed=True).agg(agg_dict).reset_index()
+    
+    # Filter for minimum attempts (at least 225 per season on average)
+    min_attempts = 225 * len(selected_years)
+    return agg_df[agg_df['attempts'] >= min_attempts]
+
+def descending_rank(values):
+    """1-based rank, highest first, with ties sharing the lowest rank (rank(ascending=False, method='min'))."""
+    negated = -np.asarray(values)
+    return np.searchsorted(np.sort(negated), negated, side='left') + 1
+
+@st.cache_data(show_spinner=False)
+def rating_comparison(df, selected_years):
+    """Seasons with both ratings, plus the top 20 by custom rating ranked under each system."""
+    # Filter to QBs with both ratings
+    comparison_df = select_seasons(df, selected_years)
+    comparison_df = comparison_df[comparison_df['composite_rating'].notna()]
+    
+    if len(selected_years) == 1:
+        top_df = comparison_df.sort_values('custom_rating', ascending=False).head(20)
+    else:
+        # Aggregate for multiple years
+        agg_dict = {
+            'custom_rating': 'mean',
+            'composite_rating': 'mean',
+            'display_name': 'first',
+            'attempts': 'sum'
+        }
+        top_df = comparison_df.groupby('player_name', as_index=False, observed=True).agg(agg_dict)
+        top_df = top_df.sort_values('custom_rating', ascending=False).head(20)
+    
+    top_df = top_df.assign(
+        Rank_Custom=descending_rank(top_df['custom_rating']),
+        Rank_Composite=descending_rank(top_df['composite_rating'])
+    )
+    top_df['Rank_Diff'] = top_df['Rank_Composite'] - top_df['Rank_Custom']
+    return comparison_df, top_df
+
+# --- Tab 8: Interactive QB Journey Map ---
+@st.cache_data(show_spinner=False)
+def league_avg_by_season(df):
+    """Mean custom rating per season, for the journey map's league-average reference line."""
+    return df.groupby('season')['custom_rating'].mean().reset_index()
+
+# --- Helper: Rating Table Colors ---
+@st.cache_data(show_spinner=False)
+def gradient_lut(cmap='RdYlGn'):
+    """CSS for each entry of the colormap's lookup table, with its bad (NaN) color appended last."""
+    import matplotlib
+    colormap = matplotlib.colormaps[cmap]
+    rgb = np.vstack([colormap(np.arange(colormap.N)), colormap(np.nan)])[:, :3]
+    
+    # Light text on dark cells, using the same relative-luminance threshold (0.408) as pandas
+    linear = np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    dark = linear @ np.array([0.2126, 0.7152, 0.0722]) < 0.408
+    
+    rgb_int = np.round(rgb * 255).astype(int)
+    hex_colors = np.char.mod('#%06x', (rgb_int[:, 0] << 16) | (rgb_int[:, 1] << 8) | rgb_int[:, 2])
+    return np.char.add(np.char.add('background-color: ', hex_colors), np.where(dark, ';color: #f1f1f1;', ';color: #000000;'))
+
+def gradient_css(values, cmap='RdYlGn', vmin=50, vmax=100):
+    """Per-cell CSS matching Styler.background_gradient, indexed from the cached colormap table."""
+    lut = gradient_lut(cmap)
+    n_colors = len(lut) - 1
+    
+    # Same binning as matplotlib: scale to [0, N), truncate, and clamp out-of-range values to the end colors
+    scaled = (values - vmin) / (vmax - vmin) * n_colors
+    index = np.clip(np.nan_to_num(scaled), 0, n_colors - 1).astype(int)
+    return lut[np.where(np.isnan(scaled), n_colors, index)]
+
+def apply_gradient(styler, cols, cmap='RdYlGn', vmin=50, vmax=100):
+    """Color `cols` of a Styler from the cached colormap CSS instead of Styler.background_gradient."""
+    css = gradient_css(styler.data[cols].to_numpy(dtype=float), cmap, vmin, vmax)
+    return styler.apply(lambda _: css, axis=None, subset=cols)
+
+# --- Helper: Scatter Labels ---
+def add_top_labels(fig, data, x, y, n=10):
+    """Label only the top `n` points by custom rating; every other QB is named on hover via hover_name."""
+    top = data.nlargest(n, 'custom_rating')
+    fig.add_trace(go.Scattergl(
+        x=top[x],
+        y=top[y],
+        mode='text',
+        text=top['display_name'],
+        textposition='top center',
+        hoverinfo='skip',
+        showlegend=False
+    ))
+
 # --- Helper: Explanation of Ratings ---
 def rating_explanation():
     st.markdown("""
@@ -208,7 +450,7 @@ def rating_explanation():
 st.set_page_config(page_title="Custom NFL QB Rankings", layout="wide")
 
 # Load data
-df, last_refresh = load_data()
+df, last_refresh, all_years, all_qbs = load_data()
 
 # Header with last updated info
 col1, col2 = st.columns([3, 1])
@@ -231,90 +473,7 @@ with tabs[0]:
     st.info("ℹ️ **Rating Scale:** All ratings are normalized across 2010-2025 (15 years) on a 50-100 scale. **100 = highest value**, 50 = lowest.")
     
     try:
-        # Define current players as those who played in 2024 or 2025
-        current_seasons = [2024, 2025]
-        current_players = df[df['season'].isin(current_seasons)]['player_name'].unique()
-        current_df = df[df['player_name'].isin(current_players)].copy()
-        
-        # Calculate weighted rating for each QB
-        rankings = []
-        
-        for qb in current_players:
-            qb_data = current_df[current_df['player_name'] == qb].sort_values('season')
-            
-            if len(qb_data) == 0:
-                continue
-            
-            # Get most recent season data
-            latest_season = qb_data.iloc[-1]
-            
-            # Separate recent (2024-2025) and historical data
-            recent_data = qb_data[qb_data['season'].isin([2024, 2025])]
-            historical_data = qb_data[~qb_data['season'].isin([2024, 2025])]
-            
-            # Calculate weighted components
-            if len(recent_data) > 0:
-                # Recent performance (70% weight) - average of 2024-2025
-                recent_rating = recent_data['custom_rating'].mean()
-                recent_weight = 0.70
-            else:
-                recent_rating = 0
-                recent_weight = 0
-            
-            # Career performance (30% weight)
-            if len(historical_data) > 0:
-                # Weight more recent historical years more (last 3 years = 50%, rest = 50%)
-                last_3_years = historical_data[historical_data['season'] >= 2021]
-                older_years = historical_data[historical_data['season'] < 2021]
-                
-                if len(last_3_years) > 0 and len(older_years) > 0:
-                    career_rating = (last_3_years['custom_rating'].mean() * 0.7 + 
-                                   older_years['custom_rating'].mean() * 0.3)
-                elif len(last_3_years) > 0:
-                    career_rating = last_3_years['custom_rating'].mean()
-                else:
-                    career_rating = older_years['custom_rating'].mean()
-                
-                career_weight = 0.30
-            else:
-                # No historical data means rookie/new player - use only recent
-                career_rating = recent_rating
-                career_weight = 0.0
-                recent_weight = 1.0
-            
-            # Final weighted rating
-            if recent_weight + career_weight > 0:
-                weighted_rating = (recent_rating * recent_weight + career_rating * career_weight)
-            else:
-                weighted_rating = latest_season['custom_rating']
-            
-            # Get additional context
-            total_seasons = len(qb_data)
-            total_attempts = qb_data['attempts'].sum()
-            seasons_played = sorted(qb_data['season'].unique())
-            
-            rankings.append({
-                'player_name': qb,
-                'weighted_rating': weighted_rating,
-                'recent_rating': recent_rating if len(recent_data) > 0 else latest_season['custom_rating'],
-                'career_rating': qb_data['custom_rating'].mean(),
-                'latest_season': latest_season['season'],
-                'seasons_played': len(seasons_played),
-                'first_season': min(seasons_played),
-                'last_season': max(seasons_played),
-                'total_attempts': total_attempts,
-                'archetype': latest_season.get('archetype', 'N/A'),
-                'mobility': latest_season['mobility_rating'],
-                'aggression': latest_season['aggression_rating'],
-                'accuracy': latest_season['accuracy_rating'],
-                'ball_security': latest_season['ball_security_rating'],
-                'pocket_presence': latest_season['pocket_presence_rating'],
-                'playmaking': latest_season['playmaking_rating']
-            })
-        
-        # Create rankings dataframe
-        rankings_df = pd.DataFrame(rankings).sort_values('weighted_rating', ascending=False).reset_index(drop=True)
-        rankings_df['rank'] = range(1, len(rankings_df) + 1)
+        rankings_df = compute_current_rankings(df)
         
         # Filters
         col1, col2, col3 = st.columns(3)
@@ -349,34 +508,13 @@ with tabs[0]:
                              'Seasons', 'Playstyle', 
                              'Playmaking', 'Aggression', 'Accuracy', 'Ball Security', 'Pocket', 'Mobility']
         
-        # Round numeric columns to 1 decimal
-        display_df['Overall Score'] = display_df['Overall Score'].round(1)
-        display_df['2024-25 (70%)'] = display_df['2024-25 (70%)'].round(1)
-        display_df['Career (30%)'] = display_df['Career (30%)'].round(1)
-        display_df['Playmaking'] = display_df['Playmaking'].round(1)
-        display_df['Aggression'] = display_df['Aggression'].round(1)
-        display_df['Accuracy'] = display_df['Accuracy'].round(1)
-        display_df['Ball Security'] = display_df['Ball Security'].round(1)
-        display_df['Pocket'] = display_df['Pocket'].round(1)
-        display_df['Mobility'] = display_df['Mobility'].round(1)
-        
-        # Style the dataframe using RdYlGn gradient like Top 32 QBs tab
+        # Round numeric columns to 1 decimal (all of them get the RdYlGn gradient below)
         gradient_cols = ['Overall Score', '2024-25 (70%)', 'Career (30%)', 
                         'Playmaking', 'Aggression', 'Accuracy', 'Ball Security', 'Pocket', 'Mobility']
+        display_df[gradient_cols] = display_df[gradient_cols].round(1)
         
-        styled_df = display_df.style\
-            .background_gradient(subset=gradient_cols, cmap='RdYlGn', vmin=50, vmax=100)\
-            .format({
-                'Overall Score': '{:.1f}',
-                '2024-25 (70%)': '{:.1f}',
-                'Career (30%)': '{:.1f}',
-                'Playmaking': '{:.1f}',
-                'Aggression': '{:.1f}',
-                'Accuracy': '{:.1f}',
-                'Ball Security': '{:.1f}',
-                'Pocket': '{:.1f}',
-                'Mobility': '{:.1f}'
-            })
+        # Style the dataframe using RdYlGn gradient like Top 32 QBs tab
+        styled_df = apply_gradient(display_df.style.format({col: '{:.1f}' for col in gradient_cols}), gradient_cols)
         
         st.dataframe(styled_df, use_container_width=True, height=600)
         
@@ -392,37 +530,37 @@ with tabs[0]:
         
         fig_trajectory = go.Figure()
         
-        # Add arrows from career average to recent performance
-        for idx, row in trajectory_data.iterrows():
-            color = 'rgba(34, 139, 34, 0.6)' if row['trajectory'] >= 0 else 'rgba(220, 20, 60, 0.6)'
-            arrow_color = 'green' if row['trajectory'] >= 0 else 'red'
-            
-            # Add dotted line
+        # Dotted career -> recent lines: one trace per direction, segments separated by gaps
+        names = trajectory_data['player_name'].to_numpy(dtype=object)
+        career = trajectory_data['career_rating'].to_numpy(dtype=float)
+        recent = trajectory_data['recent_rating'].to_numpy(dtype=float)
+        distance = recent - career
+        improving = distance >= 0
+        for mask, color in ((improving, 'rgba(34, 139, 34, 0.6)'), (~improving, 'rgba(220, 20, 60, 0.6)')):
+            seg_x = np.full(3 * mask.sum(), np.nan)
+            seg_x[0::3], seg_x[1::3] = career[mask], recent[mask]
+            seg_y = np.full(3 * mask.sum(), None, dtype=object)
+            seg_y[0::3], seg_y[1::3] = names[mask], names[mask]
             fig_trajectory.add_trace(go.Scatter(
-                x=[row['career_rating'], row['recent_rating']],
-                y=[row['player_name'], row['player_name']],
+                x=seg_x,
+                y=seg_y,
                 mode='lines',
                 line=dict(color=color, width=2, dash='dot'),
                 showlegend=False,
                 hoverinfo='skip'
             ))
-            
-            # Calculate arrow position to not overlap with dots
-            arrow_start_x = row['career_rating']
-            arrow_end_x = row['recent_rating']
-            distance = arrow_end_x - arrow_start_x
-            # Stop arrow 0.2 units before the end dot
-            if distance != 0:
-                arrow_end_adjusted = arrow_end_x - (0.2 if distance > 0 else -0.2)
-            else:
-                arrow_end_adjusted = arrow_end_x
-            
-            # Add arrow annotation (no line, just arrowhead)
-            fig_trajectory.add_annotation(
-                x=arrow_end_adjusted,
-                y=row['player_name'],
-                ax=arrow_end_adjusted - (0.01 if distance > 0 else -0.01),
-                ay=row['player_name'],
+        # Keep players in ranking order regardless of which direction trace lists them first
+        fig_trajectory.update_yaxes(categoryorder='array', categoryarray=names)
+        
+        # Arrowheads (no line), stopped 0.2 units before the end dot so they don't overlap it
+        arrow_end = recent - 0.2 * np.sign(distance)
+        arrow_start = arrow_end - np.where(distance > 0, 0.01, -0.01)
+        fig_trajectory.update_layout(annotations=[
+            dict(
+                x=x_end,
+                y=name,
+                ax=x_start,
+                ay=name,
                 xref='x',
                 yref='y',
                 axref='x',
@@ -431,10 +569,12 @@ with tabs[0]:
                 arrowhead=2,
                 arrowsize=1.2,
                 arrowwidth=2,
-                arrowcolor=arrow_color,
+                arrowcolor='green' if up else 'red',
                 opacity=0.8,
                 standoff=0
             )
+            for x_end, x_start, name, up in zip(arrow_end, arrow_start, names, improving)
+        ])
         
         # Add career average markers (small starting point)
         fig_trajectory.add_trace(go.Scatter(
@@ -463,11 +603,11 @@ with tabs[0]:
             name='Recent (2024-25)',
             hovertemplate='<b>%{y}</b><br>' +
                          'Recent Rating: %{x:.1f}<br>' +
-                         'Career Avg: ' + trajectory_data['career_rating'].apply(lambda x: f'{x:.1f}').astype(str) + '<br>' +
-                         'Change: ' + trajectory_data['trajectory'].apply(lambda x: f'{x:+.1f}').astype(str) + '<br>' +
-                         'Overall Score: ' + trajectory_data['weighted_rating'].apply(lambda x: f'{x:.1f}').astype(str) +
+                         'Career Avg: %{customdata[0]:.1f}<br>' +
+                         'Change: %{customdata[1]:+.1f}<br>' +
+                         'Overall Score: %{customdata[2]:.1f}' +
                          '<extra></extra>',
-            customdata=trajectory_data[['career_rating', 'trajectory', 'weighted_rating']]
+            customdata=trajectory_data[['career_rating', 'trajectory', 'weighted_rating']].to_numpy()
         ))
         
         fig_trajectory.update_layout(
@@ -569,12 +709,13 @@ with tabs[0]:
             
             fig_radar = go.Figure()
             
-            for _, qb in compare_data.iterrows():
+            radar_values = compare_data[['playmaking', 'aggression', 'accuracy', 'ball_security', 'pocket_presence', 'mobility']].to_numpy()
+            for r, name in zip(radar_values, compare_data['player_name'].to_numpy()):
                 fig_radar.add_trace(go.Scatterpolar(
-                    r=[qb['playmaking'], qb['aggression'], qb['accuracy'], qb['ball_security'], qb['pocket_presence'], qb['mobility']],
+                    r=r,
                     theta=categories,
                     fill='toself',
-                    name=qb['player_name']
+                    name=name
                 ))
             
             fig_radar.update_layout(
@@ -593,9 +734,7 @@ with tabs[0]:
             ]].copy()
             
             compare_table.columns = ['Rank', 'Player', 'Overall', '2024-25', 'Career', 'Seasons', 'Att', 'Style']
-            compare_table['Overall'] = compare_table['Overall'].round(1)
-            compare_table['2024-25'] = compare_table['2024-25'].round(1)
-            compare_table['Career'] = compare_table['Career'].round(1)
+            compare_table = compare_table.round({'Overall': 1, '2024-25': 1, 'Career': 1})
             
             st.dataframe(compare_table, use_container_width=True, hide_index=True)
         
@@ -644,9 +783,8 @@ with tabs[0]:
 # --- Tab 2: Top 32 QBs Table ---
 with tabs[1]:
     st.header("Top 32 QBs - Custom Ratings & Playstyle Profiles")
-    all_years = sorted(df['season'].unique(), reverse=True)
     selected_years = st.multiselect("Select Year(s)", options=all_years, default=[2024, 2025] if 2024 in all_years else all_years[:2], format_func=str, key="year_filter_tab0")
-    filtered_df = df[df['season'].isin(selected_years)]
+    filtered_df = select_seasons(df, selected_years)
     
     # If only one year is selected, show that year's ratings
     if len(selected_years) == 1:
@@ -663,10 +801,14 @@ with tabs[1]:
             'pocket_presence_rating': 'mean',
             'playmaking_rating': 'mean',
             'attempts': 'sum',
-            'display_name': 'first',
-            'archetype': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0]  # Most common archetype
+            'display_name': 'first'
         }
-        season_df = filtered_df.groupby('player_name', as_index=False).agg(agg_dict)
+        season_df = filtered_df.groupby('player_name', as_index=False, observed=True).agg(agg_dict)
+        
+        # Most common archetype per QB from one grouped count; ties go to the alphabetically first, like mode()
+        archetype_counts = filtered_df.groupby(['player_name', 'archetype'], observed=True).size().reset_index(name='n')
+        most_common = archetype_counts.sort_values('n', ascending=False, kind='stable').drop_duplicates('player_name')
+        season_df['archetype'] = most_common.set_index('player_name')['archetype'].reindex(season_df['player_name']).to_numpy()
         season_df = season_df.sort_values('custom_rating', ascending=False).head(32).reset_index(drop=True)
         season_df['Rank'] = season_df.index + 1
     
@@ -695,31 +837,17 @@ with tabs[1]:
     format_dict = {col: "{:.1f}" for col in gradient_cols}
     
     # Use custom colormap that works with 50-100 scale
-    styled = table.style.format(format_dict).background_gradient(
-        subset=gradient_cols, cmap='RdYlGn', vmin=50, vmax=100
-    )
+    styled = apply_gradient(table.style.format(format_dict), gradient_cols)
     st.dataframe(styled, use_container_width=True, height=800)
     rating_explanation()
 
 # --- Tab 3: Player Career Ratings Table ---
 with tabs[2]:
     st.header("Player Career Ratings Table")
-    player = st.selectbox("Select Player", sorted(df['display_name'].unique()))
-    player_df = df[df['display_name'] == player].sort_values('season')
+    player = st.selectbox("Select Player", all_qbs)
+    player_df = player_career_table(df, player)
     
     if not player_df.empty:
-        # Ensure no duplicates in player_df before processing
-        player_df = player_df.drop_duplicates(subset=['season', 'player_id'], keep='first')
-        
-        # Compute rank for each season (by custom_rating, descending)
-        df_ranks = df[df['season'].isin(player_df['season'])].copy()
-        df_ranks['Rank'] = df_ranks.groupby('season')['custom_rating'].rank(ascending=False, method='min')
-        
-        # Ensure df_ranks has no duplicates before merging
-        df_ranks = df_ranks.drop_duplicates(subset=['season', 'player_id'], keep='first')
-        
-        player_df = player_df.merge(df_ranks[['season', 'player_id', 'Rank']], on=['season', 'player_id'], how='left')
-        
         show_cols = [
             'season', 'Rank', 'attempts', 'custom_rating', 'playmaking_rating', 'aggression_rating',
             'accuracy_rating', 'ball_security_rating', 'pocket_presence_rating',
@@ -746,9 +874,7 @@ with tabs[2]:
         format_dict['Rank'] = "{:.0f}"
         format_dict['Attempts'] = "{:.0f}"
         
-        styled = table.style.format(format_dict).background_gradient(
-            subset=gradient_cols, cmap='RdYlGn', vmin=50, vmax=100
-        )
+        styled = apply_gradient(table.style.format(format_dict), gradient_cols)
         st.dataframe(styled, use_container_width=True, height=600)
         
         # Show radar chart for selected player
@@ -804,29 +930,8 @@ with tabs[2]:
 # --- Tab 4: Component Scores Analysis ---
 with tabs[3]:
     st.header("Rating Component Scores Analysis")
-    all_years = sorted(df['season'].unique(), reverse=True)
     selected_years = st.multiselect("Select Year(s)", all_years, default=[2024, 2025] if 2024 in all_years else [all_years[0]], key="year_filter_tab2")
-    filtered_df = df[df['season'].isin(selected_years)]
-    
-    # If multiple years, aggregate
-    if len(selected_years) > 1:
-        agg_dict = {
-            'custom_rating': 'mean',
-            'efficiency_score': 'mean',
-            'impact_score': 'mean',
-            'consistency_score': 'mean',
-            'volume_score': 'mean',
-            'ball_security_score': 'mean',
-            'pressure_score': 'mean',
-            'display_name': 'first'
-        }
-        display_df = filtered_df.groupby('player_name', as_index=False).agg(agg_dict)
-    else:
-        display_df = filtered_df.copy()
-    
-    # Sort by custom rating
-    display_df = display_df.sort_values('custom_rating', ascending=False).head(32).reset_index(drop=True)
-    display_df['Rank'] = display_df.index + 1
+    display_df = component_scores_table(df, tuple(selected_years))
     
     show_cols = [
         'Rank', 'display_name', 'custom_rating', 'efficiency_score', 'impact_score',
@@ -851,9 +956,7 @@ with tabs[3]:
     ]
     format_dict = {col: "{:.1f}" for col in gradient_cols}
     
-    styled = table.style.format(format_dict).background_gradient(
-        subset=gradient_cols, cmap='RdYlGn', vmin=50, vmax=100
-    )
+    styled = apply_gradient(table.style.format(format_dict), gradient_cols)
     st.dataframe(styled, use_container_width=True, height=800)
     
     st.markdown("""
@@ -874,24 +977,16 @@ with tabs[3]:
 # --- Tab 5: EPA vs CPOE Scatter Plot ---
 with tabs[4]:
     st.header("Total Pass EPA vs CPOE Scatter Plot")
-    all_years = sorted(df['season'].unique(), reverse=True)
     selected_years = st.multiselect("Select Year(s)", all_years, default=[2024, 2025] if 2024 in all_years else all_years[:2], key="year_filter_tab3")
     
     # Aggregate data by player across selected seasons
     if selected_years:
-        filtered_df = df[df['season'].isin(selected_years)].copy()
-        
-        # Group by player and aggregate
-        agg_df = filtered_df.groupby('display_name').agg({
+        agg_df = aggregate_qb_seasons(df, tuple(selected_years), {
             'cpoe': 'mean',
             'total_pass_epa': 'sum',  # Sum EPA across seasons
             'custom_rating': 'mean',
             'attempts': 'sum'
-        }).reset_index()
-        
-        # Filter for minimum attempts (at least 225 per season on average)
-        min_attempts = 225 * len(selected_years)
-        agg_df = agg_df[agg_df['attempts'] >= min_attempts]
+        })
     else:
         agg_df = pd.DataFrame()
     
@@ -900,7 +995,7 @@ with tabs[4]:
             agg_df,
             x='cpoe',
             y='total_pass_epa',
-            text='display_name',
+            hover_name='display_name',
             color='custom_rating',
             color_continuous_scale='RdYlGn',
             range_color=[50, 100],
@@ -909,9 +1004,11 @@ with tabs[4]:
                 'total_pass_epa': 'Total Pass EPA',
                 'custom_rating': 'Custom Rating'
             },
-            hover_data=['custom_rating', 'display_name', 'attempts']
+            hover_data=['custom_rating', 'attempts'],
+            render_mode='webgl'
         )
-        fig.update_traces(textposition='top center', marker=dict(size=14, line=dict(width=1, color='DarkSlateGrey')))
+        fig.update_traces(marker=dict(size=14, line=dict(width=1, color='DarkSlateGrey')))
+        add_top_labels(fig, agg_df, 'cpoe', 'total_pass_epa')
         
         # Add quadrant lines
         median_epa = agg_df['total_pass_epa'].median()
@@ -955,37 +1052,28 @@ with tabs[4]:
 # --- Tab 6: Sack Rate vs Yards/Attempt Scatter Plot ---
 with tabs[5]:
     st.header("Sack Rate vs Yards/Attempt Scatter Plot")
-    all_years = sorted(df['season'].unique(), reverse=True)
     selected_years = st.multiselect("Select Year(s)", all_years, default=[2024, 2025] if 2024 in all_years else all_years[:2], key="year_filter_tab5")
     
     # Aggregate data by player across selected seasons
     if selected_years:
-        filtered_df = df[df['season'].isin(selected_years)].copy()
-        
-        # Group by player and aggregate
-        agg_df = filtered_df.groupby('display_name').agg({
+        agg_df = aggregate_qb_seasons(df, tuple(selected_years), {
             'sack_rate': 'mean',
             'yards_per_attempt': 'mean',
             'custom_rating': 'mean',
             'attempts': 'sum'
-        }).reset_index()
-        
-        # Filter for minimum attempts
-        min_attempts = 225 * len(selected_years)
-        agg_df = agg_df[agg_df['attempts'] >= min_attempts]
-        
+        })
     else:
         agg_df = pd.DataFrame()
     
     if not agg_df.empty:
         # Invert sack rate so lower values are on the right (elite in top-right)
-        agg_df['inv_sack_rate'] = -agg_df['sack_rate']
+        agg_df = agg_df.assign(inv_sack_rate=-agg_df['sack_rate'])
         
         fig2 = px.scatter(
             agg_df,
             x='inv_sack_rate',
             y='yards_per_attempt',
-            text='display_name',
+            hover_name='display_name',
             color='custom_rating',
             color_continuous_scale='RdYlGn',
             range_color=[50, 100],
@@ -994,9 +1082,11 @@ with tabs[5]:
                 'yards_per_attempt': 'Yards per Attempt',
                 'custom_rating': 'Custom Rating'
             },
-            hover_data=['custom_rating', 'sack_rate', 'yards_per_attempt', 'attempts']
+            hover_data=['custom_rating', 'sack_rate', 'yards_per_attempt', 'attempts'],
+            render_mode='webgl'
         )
-        fig2.update_traces(textposition='top center', marker=dict(size=14, line=dict(width=1, color='DarkSlateGrey')))
+        fig2.update_traces(marker=dict(size=14, line=dict(width=1, color='DarkSlateGrey')))
+        add_top_labels(fig2, agg_df, 'inv_sack_rate', 'yards_per_attempt')
         
         # Add quadrant lines at median
         median_inv_sack = agg_df['inv_sack_rate'].median()
@@ -1061,11 +1151,10 @@ with tabs[6]:
     ---
     """)
     
-    all_years = sorted(df['season'].unique(), reverse=True)
     selected_years = st.multiselect("Select Year(s)", all_years, default=[2024, 2025] if 2024 in all_years else all_years[:2], key="year_filter_tab6")
     
-    # Filter to QBs with both ratings
-    comparison_df = df[df['season'].isin(selected_years) & df['composite_rating'].notna()].copy()
+    # QBs with both ratings, and the top 20 ranked under each system
+    comparison_df, top_df = rating_comparison(df, tuple(selected_years))
     
     if len(comparison_df) > 0:
         # Scatter plot
@@ -1073,16 +1162,18 @@ with tabs[6]:
             comparison_df,
             x='composite_rating',
             y='custom_rating',
-            text='display_name',
+            hover_name='display_name',
             color='season',
             labels={
                 'composite_rating': 'ML Composite Rating (0-100)',
                 'custom_rating': 'Custom Rating (50-100)',
                 'season': 'Season'
             },
-            hover_data=['season', 'display_name', 'predicted_qbr', 'predicted_elo']
+            hover_data=['season', 'predicted_qbr', 'predicted_elo'],
+            render_mode='webgl'
         )
-        fig.update_traces(textposition='top center', marker=dict(size=12))
+        fig.update_traces(marker=dict(size=12))
+        add_top_labels(fig, comparison_df, 'composite_rating', 'custom_rating')
         fig.update_layout(height=600)
         st.plotly_chart(fig, use_container_width=True)
         
@@ -1102,23 +1193,6 @@ with tabs[6]:
         # Top 20 comparison table
         st.subheader("Top 20 QBs - Rating Comparison")
         
-        if len(selected_years) == 1:
-            top_df = comparison_df.sort_values('custom_rating', ascending=False).head(20).copy()
-        else:
-            # Aggregate for multiple years
-            agg_dict = {
-                'custom_rating': 'mean',
-                'composite_rating': 'mean',
-                'display_name': 'first',
-                'attempts': 'sum'
-            }
-            top_df = comparison_df.groupby('player_name', as_index=False).agg(agg_dict)
-            top_df = top_df.sort_values('custom_rating', ascending=False).head(20)
-        
-        top_df['Rank_Custom'] = top_df['custom_rating'].rank(ascending=False, method='min').astype(int)
-        top_df['Rank_Composite'] = top_df['composite_rating'].rank(ascending=False, method='min').astype(int)
-        top_df['Rank_Diff'] = top_df['Rank_Composite'] - top_df['Rank_Custom']
-        
         display_df = top_df[['display_name', 'custom_rating', 'Rank_Custom', 'composite_rating', 'Rank_Composite', 'Rank_Diff']].copy()
         display_df.columns = ['QB Name', 'Custom Rating', 'Custom Rank', 'Composite Rating', 'Composite Rank', 'Rank Difference']
         
@@ -1129,9 +1203,10 @@ with tabs[6]:
             'Custom Rank': '{:.0f}',
             'Composite Rank': '{:.0f}',
             'Rank Difference': '{:+.0f}'
-        }).background_gradient(subset=['Custom Rating'], cmap='RdYlGn', vmin=50, vmax=100)\
-          .background_gradient(subset=['Composite Rating'], cmap='RdYlGn', vmin=0, vmax=100)\
-          .background_gradient(subset=['Rank Difference'], cmap='RdBu_r', vmin=-10, vmax=10)
+        })
+        styled = apply_gradient(styled, ['Custom Rating'])
+        styled = apply_gradient(styled, ['Composite Rating'], vmin=0, vmax=100)
+        styled = apply_gradient(styled, ['Rank Difference'], cmap='RdBu_r', vmin=-10, vmax=10)
         
         st.dataframe(styled, use_container_width=True, height=600)
         
@@ -1157,8 +1232,7 @@ with tabs[6]:
         
         with col1:
             st.markdown("**Custom Rates HIGHER** (top 10)")
-            higher_custom = comparison_df.copy()
-            higher_custom['diff'] = higher_custom['custom_rating'] - (higher_custom['composite_rating'] * 0.5)  # Normalize scales
+            higher_custom = comparison_df.assign(diff=comparison_df['custom_rating'] - (comparison_df['composite_rating'] * 0.5))  # Normalize scales
             higher_custom = higher_custom.nlargest(10, 'diff')[['display_name', 'season', 'custom_rating', 'composite_rating', 'efficiency_score', 'ball_security_score']]
             st.dataframe(higher_custom.style.format({
                 'custom_rating': '{:.1f}',
@@ -1170,8 +1244,7 @@ with tabs[6]:
         
         with col2:
             st.markdown("**Composite Rates HIGHER** (top 10)")
-            higher_composite = comparison_df.copy()
-            higher_composite['diff'] = (higher_composite['composite_rating'] * 0.5) - higher_composite['custom_rating']
+            higher_composite = comparison_df.assign(diff=(comparison_df['composite_rating'] * 0.5) - comparison_df['custom_rating'])
             higher_composite = higher_composite.nlargest(10, 'diff')[['display_name', 'season', 'custom_rating', 'composite_rating', 'impact_score', 'volume_score']]
             st.dataframe(higher_composite.style.format({
                 'custom_rating': '{:.1f}',
@@ -1192,7 +1265,7 @@ with tabs[7]:
     """)
     
     # QB selection with multi-select
-    available_qbs = sorted(df['display_name'].unique())
+    available_qbs = all_qbs
     
     # Suggested notable QBs for quick selection
     suggested_qbs = [qb for qb in ['Patrick Mahomes', 'Josh Allen', 'Joe Burrow', 'Lamar Jackson', 
@@ -1207,19 +1280,22 @@ with tabs[7]:
     
     if selected_qbs:
         # Filter data for selected QBs
-        journey_df = df[df['display_name'].isin(selected_qbs)].copy()
-        journey_df = journey_df.sort_values(['display_name', 'season'])
+        journey_df = df[df['display_name'].isin(selected_qbs)].sort_values(['display_name', 'season'])
         
-        # Create interactive line chart
+        # Partition once by QB; both the chart and the stats table below reuse these groups
+        qb_groups = dict(list(journey_df.groupby('display_name', sort=False, observed=True)))
+        
+        # Create interactive line chart; traces are collected and added in one call
         fig = go.Figure()
+        traces = []
         
         colors = px.colors.qualitative.Set2[:len(selected_qbs)]
         
         for i, qb in enumerate(selected_qbs):
-            qb_data = journey_df[journey_df['display_name'] == qb]
+            qb_data = qb_groups[qb]
             
             # Main trajectory line
-            fig.add_trace(go.Scatter(
+            traces.append(go.Scattergl(
                 x=qb_data['season'],
                 y=qb_data['custom_rating'],
                 mode='lines+markers',
@@ -1235,11 +1311,11 @@ with tabs[7]:
             ))
             
             # Add peak marker
-            peak_idx = qb_data['custom_rating'].idxmax()
-            peak_season = qb_data.loc[peak_idx, 'season']
-            peak_rating = qb_data.loc[peak_idx, 'custom_rating']
+            peak = qb_data.loc[qb_data['custom_rating'].idxmax()]
+            peak_season = peak['season']
+            peak_rating = peak['custom_rating']
             
-            fig.add_trace(go.Scatter(
+            traces.append(go.Scattergl(
                 x=[peak_season],
                 y=[peak_rating],
                 mode='markers',
@@ -1256,8 +1332,8 @@ with tabs[7]:
             ))
         
         # Add league average reference line
-        league_avg = df.groupby('season')['custom_rating'].mean().reset_index()
-        fig.add_trace(go.Scatter(
+        league_avg = league_avg_by_season(df)
+        traces.append(go.Scattergl(
             x=league_avg['season'],
             y=league_avg['custom_rating'],
             mode='lines',
@@ -1271,6 +1347,7 @@ with tabs[7]:
             )
         ))
         
+        fig.add_traces(traces)
         fig.update_layout(
             title="QB Rating Trajectories Over Time",
             xaxis_title="Season",
@@ -1302,28 +1379,28 @@ with tabs[7]:
         # Career statistics comparison
         st.subheader("Career Statistics Comparison")
         
-        career_stats = []
-        for qb in selected_qbs:
-            qb_data = journey_df[journey_df['display_name'] == qb]
-            
-            stats = {
-                'QB': qb,
-                'Seasons': len(qb_data),
-                'Peak Rating': qb_data['custom_rating'].max(),
-                'Avg Rating': qb_data['custom_rating'].mean(),
-                'Current (2025)': qb_data[qb_data['season'] == 2025]['custom_rating'].values[0] if 2025 in qb_data['season'].values else 'N/A',
-                'Archetype': qb_data['archetype'].mode()[0] if not qb_data['archetype'].mode().empty else 'N/A',
-                'Total Attempts': qb_data['attempts'].sum()
-            }
-            career_stats.append(stats)
+        # All career stats from one grouped pass, in the order the QBs were selected
+        career_df = journey_df.groupby('display_name', sort=False, observed=True).agg(**{
+            'Seasons': ('season', 'size'),
+            'Peak Rating': ('custom_rating', 'max'),
+            'Avg Rating': ('custom_rating', 'mean'),
+            'Total Attempts': ('attempts', 'sum')
+        }).reindex(selected_qbs)
+        
+        current = journey_df[journey_df['season'] == 2025].drop_duplicates('display_name').set_index('display_name')['custom_rating']
+        career_df.insert(3, 'Current (2025)', [current.get(qb, 'N/A') for qb in career_df.index])
         
-        career_df = pd.DataFrame(career_stats)
+        # Most common archetype per QB; ties go to the alphabetically first, like mode()
+        archetype_counts = journey_df.groupby(['display_name', 'archetype'], observed=True).size().reset_index(name='n')
+        most_common = archetype_counts.sort_values('n', ascending=False, kind='stable').drop_duplicates('display_name')
+        career_df.insert(4, 'Archetype', most_common.set_index('display_name')['archetype'].reindex(career_df.index).to_numpy())
+        career_df = career_df.rename_axis('QB').reset_index()
         
         # Format the dataframe
         st.dataframe(career_df.style.format({
             'Peak Rating': '{:.1f}',
             'Avg Rating': '{:.1f}',
-            'Current (2025)': lambda x: f'{x:.1f}' if isinstance(x, (int, float)) else x,
+            'Current (2025)': lambda x: x if isinstance(x, str) else f'{x:.1f}',
             'Total Attempts': '{:,.0f}'
         }), use_container_width=True)
         
@@ -1331,12 +1408,13 @@ with tabs[7]:
         if len(selected_qbs) == 1:
             st.subheader(f"{selected_qbs[0]} - Playstyle Evolution")
             
-            qb_journey = journey_df[journey_df['display_name'] == selected_qbs[0]]
+            qb_journey = qb_groups[selected_qbs[0]]
             
             playstyle_cols = ['playmaking_rating', 'aggression_rating', 'accuracy_rating',
                             'ball_security_rating', 'pocket_presence_rating', 'mobility_rating']
             
             fig_evolution = go.Figure()
+            traces = []
             
             playstyle_colors = {
                 'playmaking_rating': '#FF6B6B',
@@ -1350,7 +1428,7 @@ with tabs[7]:
             for col in playstyle_cols:
                 display_name = col.replace('_rating', '').replace('_', ' ').title()
                 
-                fig_evolution.add_trace(go.Scatter(
+                traces.append(go.Scattergl(
                     x=qb_journey['season'],
                     y=qb_journey[col],
                     mode='lines+markers',
@@ -1359,6 +1437,7 @@ with tabs[7]:
                     marker=dict(size=8)
                 ))
             
+            fig_evolution.add_traces(traces)
             fig_evolution.update_layout(
                 title=f"{selected_qbs[0]} Playstyle Ratings Evolution",
                 xaxis_title="Season",
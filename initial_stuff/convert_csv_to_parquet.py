@@ -0,0 +1,39 @@
+"""
+Convert the Streamlit app's rankings and situational CSVs to Parquet (zstd, dictionary-encoded strings).
+Run once from the app directory after regenerating the CSVs; the app reads the
+.parquet copies when they exist and falls back to the CSVs otherwise.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+CSV_FILES = ['qb_rankings_2010_2025.csv', 'qb_rankings_by_season.csv', 'situational_epa_top20.csv']
+
+def convert_csv_to_parquet(csv_path):
+    """Write a Parquet copy next to `csv_path`, downcasting float64 columns to float32."""
+    df = pd.read_csv(csv_path)
+    float_cols = df.select_dtypes('float64').columns
+    df[float_cols] = df[float_cols].astype('float32')
+    
+    # Season-sorted rows give tight row-group statistics for the app's season filter pushdown
+    if 'season' in df.columns:
+        df = df.sort_values('season', kind='stable')
+    
+    parquet_path = Path(csv_path).with_suffix('.parquet')
+    df.to_parquet(
+        parquet_path,
+        engine='pyarrow',
+        compression='zstd',
+        use_dictionary=True,
+        index=False
+    )
+    print(f"[OK] {csv_path} -> {parquet_path} ({len(df):,} rows)")
+    return parquet_path
+
+if __name__ == '__main__':
+    for csv_path in CSV_FILES:
+        if Path(csv_path).exists():
+            convert_csv_to_parquet(csv_path)
+        else:
+            print(f"[SKIP] {csv_path} not found")
@@ -2,8 +2,13 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+import pyarrow.parquet as pq
 from plotly.subplots import make_subplots
+import base64
+import io
+from functools import lru_cache
 from math import pi
+from pathlib import Path
 
 # Page configuration
 st.set_page_config(
@@ -29,32 +34,333 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Load data
+# Composite score inputs (same weights as the notebook model); the last weight applies to inverted sack_rate
+FEATURE_COLS = ['total_epa_per_play', 'cpoe_mean', 'yards_per_attempt', 'td_turnover_ratio', 'completion_pct']
+FEATURE_WEIGHTS = np.array([0.25, 0.15, 0.12, 0.11, 0.09, 0.05])
+
+# Radar chart axes and color maps - fixed for the app, so defined once at import
+CATEGORIES = ['Mobility', 'Aggression', 'Accuracy', 'Ball Security', 'Pocket Presence']
+
+# Color mapping for primary archetypes
+ARCHETYPE_COLORS = {
+    'Mobile Playmaker': '#9467bd',
+    'Deep Threat': '#d62728',
+    'Quick-Release Specialist': '#2ca02c',
+    'Ball Protector': '#1f77b4',
+    'Efficient Passer': '#ff7f0e'
+}
+
+# NFL team colors and team assignments (2024-2025 season)
+NFL_COLORS = {
+    'ARI': '#97233F', 'ATL': '#A71930', 'BAL': '#241773', 'BUF': '#00338D',
+    'CAR': '#0085CA', 'CHI': '#C83803', 'CIN': '#FB4F14', 'CLE': '#311D00',
+    'DAL': '#041E42', 'DEN': '#FB4F14', 'DET': '#0076B6', 'GB': '#203731',
+    'HOU': '#03202F', 'IND': '#002C5F', 'JAX': '#006778', 'KC': '#E31837',
+    'LAC': '#0080C6', 'LAR': '#003594', 'LV': '#000000', 'MIA': '#008E97',
+    'MIN': '#4F2683', 'NE': '#002244', 'NO': '#D3BC8D', 'NYG': '#0B2265',
+    'NYJ': '#125740', 'PHI': '#004C54', 'PIT': '#FFB612', 'SEA': '#002244',
+    'SF': '#AA0000', 'TB': '#D50A0A', 'TEN': '#0C2340', 'WAS': '#5A1414'
+}
+
+QB_TEAMS = {
+    'J.Allen': 'BUF', 'P.Mahomes': 'KC', 'B.Purdy': 'SF', 'L.Jackson': 'BAL',
+    'J.Hurts': 'PHI', 'J.Burrow': 'CIN', 'J.Goff': 'DET', 'D.Prescott': 'DAL',
+    'J.Love': 'GB', 'T.Tagovailoa': 'MIA', 'J.Daniels': 'WAS', 'M.Stafford': 'LAR',
+    'D.Maye': 'NE', 'T.Brady': 'TB', 'J.Herbert': 'LAC', 'K.Cousins': 'ATL',
+    'J.Garoppolo': 'LV', 'T.Bridgewater': 'DET', 'D.Carr': 'NO', 'G.Smith': 'SEA',
+    'K.Murray': 'ARI', 'A.Rodgers': 'NYJ', 'B.Mayfield': 'TB', 'C.Stroud': 'HOU',
+    'R.Wilson': 'PIT', 'M.Mariota': 'WAS', 'S.Darnold': 'MIN', 'B.Nix': 'DEN',
+    'D.Jones': 'NYG', 'R.Tannehill': 'TEN', 'D.Watson': 'CLE', 'T.Lawrence': 'JAX',
+    'A.Richardson': 'IND', 'C.Williams': 'CHI', 'B.Young': 'CAR', 'W.Levis': 'TEN',
+    'A.O\'Connell': 'NE', 'J.Fields': 'PIT', 'Z.Wilson': 'DEN', 'M.Jones': 'JAX',
+    'K.Pickett': 'PHI', 'D.Lock': 'NYG', 'J.Winston': 'CLE', 'T.Huntley': 'MIA',
+    'C.Rush': 'DAL', 'B.Rypien': 'LAR', 'M.White': 'MIA', 'J.Stidham': 'DEN',
+    'C.McCoy': 'WAS', 'J.Dobbs': 'SF', 'J.Brissett': 'NE', 'T.Heinicke': 'ATL',
+    'J.Flacco': 'IND', 'A.Dalton': 'CAR', 'T.Hill': 'NO', 'M.Glennon': 'NYG',
+    'N.Mullens': 'MIN', 'C.Wentz': 'LAR', 'B.Hoyer': 'LV', 'G.Minshew': 'LV',
+    'T.Siemian': 'CHI', 'J.Johnson': 'BAL', 'C.Hundley': 'ARI', 'S.Howell': 'SEA'
+}
+
+def minmax_0_100(x, lo, hi, invert=False, fallback=50.0):
+    """Scale `x` from [lo, hi] to 0-100, clipped and optionally inverted; `fallback` wherever hi <= lo."""
+    valid = hi > lo
+    scaled = 100 * (x - lo) / np.where(valid, hi - lo, 1)
+    scaled = np.where(invert, 100 - scaled, scaled)
+    return np.where(valid, np.clip(scaled, 0, 100), fallback)
+
+def minmax_scale(X, fallback=50.0, dtype=np.float64):
+    """Scale each column of a 2D array to 0-100; constant columns get `fallback`."""
+    X = np.asarray(X, dtype=dtype)
+    return minmax_0_100(X, np.nanmin(X, axis=0), np.nanmax(X, axis=0), fallback=fallback)
+
+def map_by_category(values, mapping):
+    """Look up `mapping` once per distinct value, then broadcast back via category codes."""
+    cat = pd.Categorical(values)
+    lookup = pd.Series(mapping, dtype=object).reindex(cat.categories).to_numpy()
+    mapped = np.where(cat.codes >= 0, lookup[cat.codes] if len(lookup) else np.nan, np.nan)
+    return pd.Series(mapped, index=values.index, dtype=object)
+
+@st.cache_data(show_spinner=False)
+def build_radar_figure(name, values, color, rank, custom_archetype, categories):
+    """Build one QB's playstyle radar chart, returned as a cacheable figure dict."""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatterpolar(
+        r=list(values) + [values[0]],
+        theta=list(categories) + [categories[0]],
+        fill='toself',
+        line_color=color,
+        fillcolor=color,
+        opacity=0.6,
+        name=name
+    ))
+    
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 100], showticklabels=False)
+        ),
+        showlegend=False,
+        title=dict(
+            text=f"#{rank} {name}<br><sub>{custom_archetype}</sub>",
+            font=dict(size=11)
+        ),
+        height=300,
+        margin=dict(l=60, r=60, t=60, b=60)
+    )
+    return fig.to_dict()
+
+@st.cache_data(show_spinner=False)
+def quadrant_background(x_bounds, y_bounds, x_mid, y_mid, quadrant_labels):
+    """Render median lines and corner labels as a transparent PNG data URI.
+    
+    `quadrant_labels` holds (text, corner, face_rgba, edge_color, text_color) tuples,
+    where corner is e.g. 'upper right'. Plotly stretches the image over the axes, so
+    the client blits one texture instead of re-laying out shapes and annotations.
+    """
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=(12, 7), dpi=100)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(*x_bounds)
+    ax.set_ylim(*y_bounds)
+    ax.axis('off')
+    ax.axhline(y_mid, color='gray', linestyle='--', alpha=0.5)
+    ax.axvline(x_mid, color='gray', linestyle='--', alpha=0.5)
+    
+    for text, corner, face, edge, color in quadrant_labels:
+        vertical, horizontal = corner.split()
+        ax.text(
+            0.98 if horizontal == 'right' else 0.02,
+            0.98 if vertical == 'upper' else 0.02,
+            text,
+            transform=ax.transAxes,
+            ha=horizontal,
+            va='top' if vertical == 'upper' else 'bottom',
+            multialignment=horizontal,
+            fontsize=10,
+            color=color,
+            bbox=dict(facecolor=face, edgecolor=edge, linewidth=2)
+        )
+    
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', transparent=True)
+    return 'data:image/png;base64,' + base64.b64encode(buf.getvalue()).decode('ascii')
+
+@st.cache_resource
+def layout_template(kind):
+    """Plotly layout settings shared by a family of charts; built once per process, unpack with ** (don't mutate)."""
+    templates = {
+        'scatter': dict(height=700, hovermode='closest'),
+        'career_line': dict(height=400, hovermode='x unified', showlegend=True),
+    }
+    return templates[kind]
+
+# Tab 2 pocket chart corner labels: (text, sack rate side, Y/A side, fill, border, text color).
+# The x-axis is reversed, so the 'min' sack rate side is drawn on the right.
+POCKET_QUADRANT_LABELS = (
+    ("Elite<br>(Low Sacks, High Y/A)", 'min', 'max', "rgba(0, 255, 0, 0.2)", "green", "darkgreen"),
+    ("High Risk<br>High Reward", 'max', 'max', "rgba(255, 255, 0, 0.2)", "orange", "darkorange"),
+    ("Conservative<br>(Low Sacks, Low Y/A)", 'min', 'min', "rgba(255, 255, 0, 0.2)", "orange", "darkorange"),
+    ("High Risk<br>Low Reward", 'max', 'min', "rgba(255, 0, 0, 0.2)", "red", "darkred"),
+)
+
+@st.cache_data(show_spinner=False)
+def pocket_base_figure(x_bounds, y_bounds, x_mid, y_mid):
+    """Median lines, corner labels and layout of the Sack Rate vs Y/A chart, as a figure dict."""
+    fig = go.Figure()
+    
+    fig.add_hline(y=y_mid, line_dash="dash", line_color="gray", opacity=0.5)
+    fig.add_vline(x=x_mid, line_dash="dash", line_color="gray", opacity=0.5)
+    
+    x_pad = (x_bounds[1] - x_bounds[0]) * 0.02
+    y_pad = (y_bounds[1] - y_bounds[0]) * 0.02
+    for text, x_side, y_side, bgcolor, bordercolor, color in POCKET_QUADRANT_LABELS:
+        side = 'left' if x_side == 'min' else 'right'
+        fig.add_annotation(
+            x=x_bounds[0] + x_pad if x_side == 'min' else x_bounds[1] - x_pad,
+            y=y_bounds[1] - y_pad if y_side == 'max' else y_bounds[0] + y_pad,
+            text=text,
+            showarrow=False,
+            bgcolor=bgcolor,
+            bordercolor=bordercolor,
+            borderwidth=2,
+            font=dict(size=10, color=color),
+            align=side,
+            xanchor=side,
+            yanchor='top' if y_side == 'max' else 'bottom'
+        )
+    
+    fig.update_layout(
+        title="QB Pocket Management vs Offensive Output",
+        xaxis_title="Sack Rate (%)",
+        yaxis_title="Yards per Attempt",
+        xaxis=dict(autorange='reversed'),  # Invert x-axis
+        **layout_template('scatter')
+    )
+    return fig.to_dict()
+
+# Columns the app actually uses from the rankings CSVs, with compact dtypes
+USE_COLS = [
+    'passer_player_name', 'season', 'pass_attempts', 'total_epa_per_play', 'cpoe_mean',
+    'sack_rate', 'yards_per_attempt', 'td_turnover_ratio', 'success_rate', 'completion_pct',
+    'rushing_yards', 'interceptions', 'fumbles_lost', 'total_plays', 'total_games',
+    'rush_attempts', 'composite_score', 'qb_rating', 'rank', 'percentile'
+]
+DTYPES = {col: 'float32' for col in USE_COLS}
+DTYPES.update({'passer_player_name': 'string[pyarrow]', 'season': 'int16', 'rank': 'Int16'})
+
+# Parse each rankings file once per process; both load_data branches share it.
+# `seasons` (tuple of ints) restricts rows at read time instead of masking afterwards.
 @st.cache_data
-def load_data(season_filter="All Years"):
+def read_rankings(path, seasons=None):
+    # Prefer the Parquet copy (see convert_csv_to_parquet.py): no text parsing, typed schema,
+    # and the season filter is pushed down so non-matching row groups are never decoded
+    parquet_path = Path(path).with_suffix('.parquet')
+    if parquet_path.exists():
+        columns = [col for col in pq.read_schema(parquet_path).names if col in DTYPES]
+        filters = [('season', 'in', list(seasons))] if seasons is not None else None
+        table = pq.read_table(parquet_path, columns=columns, filters=filters, memory_map=True)
+        return table.to_pandas().astype({col: DTYPES[col] for col in columns})
+    
+    # Callable usecols tolerates columns missing from one of the files (e.g. season)
+    df = pd.read_csv(path, usecols=lambda col: col in DTYPES, dtype=DTYPES)
+    if seasons is not None:
+        df = df[df['season'].isin(seasons)].reset_index(drop=True)
+    return df
+
+# Situational EPA splits (Tab 2 heatmaps), parsed once per process and season selection
+SITUATIONAL_COLS = ['qb_name', 'season', 'down', 'field_zone', 'score_situation', 'epa']
+
+@st.cache_data(ttl=3600)
+def load_situational(seasons=None):
+    # Prefer the Parquet copy so only the needed columns and seasons are materialized
+    parquet_path = Path('situational_epa_top20.parquet')
+    filters = [('season', 'in', list(seasons))] if seasons is not None else None
+    if parquet_path.exists():
+        return pd.read_parquet(parquet_path, engine='pyarrow', columns=SITUATIONAL_COLS, filters=filters)
+    
+    df = pd.read_csv('situational_epa_top20.csv', usecols=SITUATIONAL_COLS)
+    if seasons is not None:
+        df = df[df['season'].isin(seasons)]
+    return df
+
+def season_filter_key(season_filter):
+    """Canonical, hashable key for a sidebar season selection (used as the cache key)."""
+    if isinstance(season_filter, (list, tuple)):
+        years = tuple(sorted({int(y) for y in season_filter}))
+        if not years:
+            # Empty selection falls back to all years
+            return ('all',)
+        if len(years) > 1 and years == tuple(range(years[0], years[-1] + 1)):
+            return ('range', years[0], years[-1])
+        return ('multi', years)
     if season_filter == "All Years":
+        return ('all',)
+    return ('single', int(season_filter))
+
+def filter_key_seasons(filter_key):
+    """Seasons selected by a canonical filter key, or None for all years."""
+    kind = filter_key[0]
+    if kind == 'all':
+        return None
+    if kind == 'range':
+        return tuple(range(filter_key[1], filter_key[2] + 1))
+    if kind == 'multi':
+        return filter_key[1]
+    return (filter_key[1],)
+
+@lru_cache(maxsize=64)
+def format_year_display(filter_key):
+    """Title text for a canonical season filter key, e.g. '2010-2025' or '2019, 2021'."""
+    kind = filter_key[0]
+    if kind == 'all':
+        return "2010-2025"
+    if kind == 'single':
+        return str(filter_key[1])
+    if kind == 'range':
+        return f"{filter_key[1]}-{filter_key[2]}"
+    return ", ".join(map(str, filter_key[1]))
+
+# Column orders for the situational heatmaps (down keeps its natural order)
+SITUATION_ORDERS = {
+    'field_zone': ['Red Zone', 'Scoring Range', 'Midfield', 'Own Territory'],
+    'score_situation': ['Down 2+ Scores', 'Down 4-8', 'Close', 'Up 4-8', 'Up 2+ Scores'],
+}
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_situational_pivots(filter_key, qb_names):
+    """Heatmap z/x/y/text arrays of mean EPA per QB for each situation (best QB on top)."""
+    situational_df = load_situational(filter_key_seasons(filter_key))
+    situational_df = situational_df[situational_df['qb_name'].isin(qb_names)]
+    
+    pivots = {}
+    for situation in ('down', 'field_zone', 'score_situation'):
+        heatmap_data = situational_df.pivot_table(
+            index='qb_name',
+            columns=situation,
+            values='epa',
+            aggfunc='mean'
+        )
+        if situation in SITUATION_ORDERS:
+            heatmap_data = heatmap_data.reindex(columns=SITUATION_ORDERS[situation], fill_value=0)
+        
+        # Ensure all available top 20 QBs are in the heatmap (add missing ones with zeros)
+        heatmap_data = heatmap_data.reindex(index=list(qb_names), fill_value=0).iloc[::-1]
+        
+        # Plain arrays built once here, so reruns hand them straight to go.Heatmap
+        # (labels are rounded in float64 so they print as e.g. 0.09, not 0.0900000036)
+        values = heatmap_data.to_numpy(dtype=np.float64)
+        pivots[situation] = dict(
+            z=values.astype(np.float32),
+            x=heatmap_data.columns.tolist(),
+            y=heatmap_data.index.tolist(),
+            text=np.round(values, 2)
+        )
+    return pivots
+
+# Load data
+def load_data(season_filter="All Years"):
+    return _load_data_inner(season_filter_key(season_filter))
+
+# Caches the fully preprocessed (df, top_30, teams) bundle per canonical filter key
+@st.cache_data(max_entries=32, show_spinner=False, persist='disk')
+def _load_data_inner(filter_key):
+    kind = filter_key[0]
+    
+    if kind == 'all':
         # Load aggregate rankings (original format - one row per QB)
-        df = pd.read_csv('qb_rankings_2010_2025.csv')
+        df = read_rankings('qb_rankings_2010_2025.csv')
     else:
-        # Load per-season data and filter
-        df = pd.read_csv('qb_rankings_by_season.csv')
+        # Load per-season data for the selected season(s) only
+        seasons = filter_key_seasons(filter_key)
+        df = read_rankings('qb_rankings_by_season.csv', seasons)
         
-        # Handle multiple years (list) or single year (string)
-        if isinstance(season_filter, list):
-            # Handle empty list
-            if not season_filter:
-                # Fall back to all years
-                df = pd.read_csv('qb_rankings_2010_2025.csv')
-                return load_data("All Years")
-            
-            # Convert list elements to int if they're strings
-            years = [int(y) if isinstance(y, str) else y for y in season_filter]
-            df = df[df['season'].isin(years)]
-            
+        # Handle multiple years (aggregate per QB) or single year (one row per QB)
+        if kind != 'single':
             # Check if we have data after filtering
             if len(df) == 0:
-                st.error(f"No data found for selected years: {season_filter}")
-                return load_data("All Years")
+                st.error(f"No data found for selected years: {list(seasons)}")
+                return _load_data_inner(('all',))
             
             # Aggregate across selected years
             agg_funcs = {
@@ -72,246 +378,245 @@ def load_data(season_filter="All Years"):
                 'total_plays': 'sum',
                 'total_games': 'sum'
             }
-            df = df.groupby('passer_player_name').agg(agg_funcs).reset_index()
-        else:
-            df = df[df['season'] == int(season_filter)]
+            # One stable sort by QB code, then np.add.reduceat per column (NaNs skipped like pandas)
+            sum_cols = [col for col, func in agg_funcs.items() if func == 'sum']
+            mean_cols = [col for col, func in agg_funcs.items() if func == 'mean']
+            codes, names = pd.factorize(df['passer_player_name'], sort=True)
+            order = np.argsort(codes, kind='stable')
+            order = order[codes[order] >= 0]
+            codes_sorted = codes[order]
+            breaks = np.r_[0, np.flatnonzero(np.diff(codes_sorted)) + 1]
+            
+            values = df[sum_cols + mean_cols].to_numpy(dtype=np.float64)[order]
+            present = ~np.isnan(values)
+            totals = np.add.reduceat(np.where(present, values, 0.0), breaks, axis=0)
+            counts = np.add.reduceat(present.astype(np.int64), breaks, axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = totals[:, len(sum_cols):] / counts[:, len(sum_cols):]
+            
+            df = pd.DataFrame(
+                np.hstack([totals[:, :len(sum_cols)], means]),
+                columns=sum_cols + mean_cols
+            )
+            df.insert(0, 'passer_player_name', names[codes_sorted[breaks]])
+            df = df[['passer_player_name'] + list(agg_funcs)]
         
         # Calculate composite score for filtered data using same weights as notebook
-        feature_columns = ['total_epa_per_play', 'cpoe_mean', 'yards_per_attempt', 
-                          'td_turnover_ratio', 'completion_pct']
-        
-        # Normalize features to 0-100
-        X_normalized = df[feature_columns].copy()
-        for col in feature_columns:
-            min_val = df[col].min()
-            max_val = df[col].max()
-            if max_val > min_val:
-                X_normalized[col] = 100 * (df[col] - min_val) / (max_val - min_val)
-            else:
-                X_normalized[col] = 50
+        # Normalize features (plus sack_rate) to 0-100 in a single vectorized pass
+        X_scaled = minmax_scale(df[FEATURE_COLS + ['sack_rate']].to_numpy(dtype=np.float64))
         
         # Invert sack_rate (lower is better)
-        min_val = df['sack_rate'].min()
-        max_val = df['sack_rate'].max()
-        if max_val > min_val:
-            X_normalized['sack_rate_inv'] = 100 - (100 * (df['sack_rate'] - min_val) / (max_val - min_val))
-        else:
-            X_normalized['sack_rate_inv'] = 50
+        X_scaled[:, -1] = 100 - X_scaled[:, -1]
         
-        # Calculate composite score with updated notebook weights
-        feature_weights = {
-            'total_epa_per_play': 0.25,
-            'cpoe_mean': 0.15,
-            'yards_per_attempt': 0.12,
-            'td_turnover_ratio': 0.11,
-            'completion_pct': 0.09,
-            'sack_rate_inv': 0.05
-        }
-        
-        df['composite_score'] = sum(
-            X_normalized[col] * feature_weights[col] 
-            for col in feature_weights.keys()
-        )
+        # Weighted sum of all six normalized features as one matrix-vector product
+        df['composite_score'] = X_scaled @ FEATURE_WEIGHTS
         
         # Normalize to 0-100
-        min_score = df['composite_score'].min()
-        max_score = df['composite_score'].max()
-        df['qb_rating'] = 100 * (df['composite_score'] - min_score) / (max_score - min_score)
+        df['qb_rating'] = minmax_0_100(
+            df['composite_score'].to_numpy(), df['composite_score'].min(), df['composite_score'].max()
+        )
         
-        # Sort and rank
-        df = df.sort_values('qb_rating', ascending=False).reset_index(drop=True)
-        df['rank'] = range(1, len(df) + 1)
+        # Rank without a full sort (ties keep row order, missing ratings rank last)
+        df['rank'] = df['qb_rating'].rank(ascending=False, method='first', na_option='bottom').astype(int)
         df['percentile'] = 100 * (len(df) - df['rank'] + 1) / len(df)
     # Get top 30 and calculate playstyle dimensions
-    top_30 = df.head(30).copy()
+    # Derived columns are built as arrays and attached with a single assign() at the end
+    top_30 = df.nlargest(30, 'qb_rating')
+    playstyle_dims = ['mobility_score', 'aggression_score', 'accuracy_score', 
+                      'ball_security_score', 'pocket_presence_score']
     
-    # Calculate raw playstyle metrics first
-    top_30['mobility_raw'] = top_30['rushing_yards'] / top_30['total_games']
-    top_30['aggression_raw'] = top_30['yards_per_attempt']
-    top_30['accuracy_raw'] = top_30['cpoe_mean']
-    top_30['turnover_rate'] = ((top_30['interceptions'] + top_30['fumbles_lost']) / top_30['total_plays']) * 100
+    # Calculate raw playstyle metrics first (float32: scores are only shown to 1 decimal)
+    mobility_raw = (top_30['rushing_yards'] / top_30['total_games']).to_numpy(dtype=np.float32)
+    aggression_raw = top_30['yards_per_attempt'].to_numpy(dtype=np.float32)
+    accuracy_raw = top_30['cpoe_mean'].to_numpy(dtype=np.float32)
+    turnover_rate = (((top_30['interceptions'] + top_30['fumbles_lost']) / top_30['total_plays']) * 100).to_numpy(dtype=np.float32)
+    sack_rate = top_30['sack_rate'].to_numpy(dtype=np.float32)
     
     # PER-SEASON NORMALIZATION (matching Career Progression)
     # When filtered to single season, normalize within that season
     # When "All Years", normalize within the full dataset
     
-    if 'season' in df.columns and 'rush_attempts' in df.columns and isinstance(season_filter, (int, str)) and season_filter != "All Years":
+    if kind == 'single' and 'season' in df.columns and 'rush_attempts' in df.columns:
         # Single season selected - use ONLY that season for normalization
         # For current year (2025), use lower threshold since season is incomplete
         # For completed seasons, require 300+ pass attempts to ensure qualified starters
-        min_attempts = 120 if season_filter == 2025 else 300
+        season = filter_key[1]
+        min_attempts = 120 if season == 2025 else 300
         # Filter to the specific season AND pass attempts threshold
-        season_df = df[(df['season'] == int(season_filter)) & (df['pass_attempts'] >= min_attempts)].copy()
+        season_df = df[(df['season'] == season) & (df['pass_attempts'] >= min_attempts)].copy()
         
         # Mobility: normalize within season (20+ rush attempts)
-        # Calculate normalization pool ONCE for the entire season
-        mobility_pool = season_df[season_df['rush_attempts'] >= 20].copy()
-        if len(mobility_pool) > 1:
-            mobility_pool['rush_ypg'] = mobility_pool['rushing_yards'] / mobility_pool['total_games']
-            min_mob = mobility_pool['rush_ypg'].min()
-            max_mob = mobility_pool['rush_ypg'].max()
-            
-            # Normalize each QB's mobility score
-            if max_mob > min_mob:
-                top_30['mobility_score'] = top_30['mobility_raw'].apply(
-                    lambda x: max(0, min(100, 100 * (x - min_mob) / (max_mob - min_mob)))
-                )
-            else:
-                top_30['mobility_score'] = 50
-        else:
-            top_30['mobility_score'] = 50
+        # Calculate normalization pool ONCE for the entire season (fewer than 2 QBs -> 50)
+        mobility_pool = season_df[season_df['rush_attempts'] >= 20]
+        rush_ypg = mobility_pool['rushing_yards'] / mobility_pool['total_games']
+        mobility_bounds = [[rush_ypg.min()], [rush_ypg.max()]] if len(mobility_pool) > 1 else [[np.nan], [np.nan]]
         
         # Aggression, Accuracy, Ball Security, Pocket Presence: normalize within season
-        min_agg, max_agg = season_df['yards_per_attempt'].min(), season_df['yards_per_attempt'].max()
-        if max_agg > min_agg:
-            top_30['aggression_score'] = 100 * (top_30['aggression_raw'] - min_agg) / (max_agg - min_agg)
-        else:
-            top_30['aggression_score'] = 50
-        
-        min_acc, max_acc = season_df['cpoe_mean'].min(), season_df['cpoe_mean'].max()
-        if max_acc > min_acc:
-            top_30['accuracy_score'] = 100 * (top_30['accuracy_raw'] - min_acc) / (max_acc - min_acc)
-        else:
-            top_30['accuracy_score'] = 50
-        
+        # One min/max pass over the season pool, then a single broadcast over top 30
         season_df['to_rate'] = ((season_df['interceptions'] + season_df['fumbles_lost']) / season_df['total_plays']) * 100
-        min_to, max_to = season_df['to_rate'].min(), season_df['to_rate'].max()
-        if max_to > min_to:
-            top_30['ball_security_score'] = 100 - (100 * (top_30['turnover_rate'] - min_to) / (max_to - min_to))
-        else:
-            top_30['ball_security_score'] = 50
+        pool_cols = ['yards_per_attempt', 'cpoe_mean', 'to_rate', 'sack_rate']
+        
+        MIN, MAX = 0, 1
+        stats = np.hstack([mobility_bounds, season_df[pool_cols].agg(['min', 'max'])]).astype(np.float32)
+        raw = np.column_stack([mobility_raw, aggression_raw, accuracy_raw, turnover_rate, sack_rate])
         
-        min_sack, max_sack = season_df['sack_rate'].min(), season_df['sack_rate'].max()
-        if max_sack > min_sack:
-            top_30['pocket_presence_score'] = 100 - (100 * (top_30['sack_rate'] - min_sack) / (max_sack - min_sack))
-        else:
-            top_30['pocket_presence_score'] = 50
+        # Ball security and pocket presence are inverted (lower turnover/sack rate is better)
+        invert = np.array([False, False, False, True, True])
+        scores = minmax_0_100(raw, stats[MIN], stats[MAX], invert=invert, fallback=np.float32(50.0))
     else:
         # All Years or multiple years - normalize within top 30 (original behavior)
-        top_30['mobility_score'] = top_30['mobility_raw']
-        top_30['aggression_score'] = top_30['aggression_raw']
-        top_30['accuracy_score'] = top_30['accuracy_raw']
-        top_30['ball_security_score'] = 100 - (top_30['turnover_rate'] * 10)
-        top_30['pocket_presence_score'] = 100 - (top_30['sack_rate'] * 2)
-        
-        playstyle_dims = ['mobility_score', 'aggression_score', 'accuracy_score', 
-                          'ball_security_score', 'pocket_presence_score']
-        
-        for dim in playstyle_dims:
-            min_val = top_30[dim].min()
-            max_val = top_30[dim].max()
-            if max_val > min_val:
-                top_30[dim] = 100 * (top_30[dim] - min_val) / (max_val - min_val)
-            else:
-                top_30[dim] = 50
-    
-    # Define playstyle_dims for rounding (used later in code)
-    playstyle_dims = ['mobility_score', 'aggression_score', 'accuracy_score', 
-                      'ball_security_score', 'pocket_presence_score']
+        scores = minmax_scale(np.column_stack([
+            mobility_raw,
+            aggression_raw,
+            accuracy_raw,
+            100 - (turnover_rate * 10),
+            100 - (sack_rate * 2)
+        ]), dtype=np.float32)
     
     # Round playstyle scores to 1 decimal
-    for dim in playstyle_dims:
-        top_30[dim] = top_30[dim].round(1)
+    scores = np.round(scores, 1)
     
-    # Round qb_rating to 1 decimal
-    top_30['qb_rating'] = top_30['qb_rating'].round(1)
+    # Assign custom archetypes (matching notebook logic), vectorized over all QBs
+    elite = scores > 75
+    mob, agg, acc, sec, pkt = elite.T
+    elite_dims = elite.sum(axis=1)
+    good_dims = (scores > 40).sum(axis=1)
+    poor_dims = (scores < 40).sum(axis=1)
     
-    # Assign custom archetypes (matching notebook logic)
-    def assign_custom_archetype(row):
-        mob = row['mobility_score']
-        agg = row['aggression_score']
-        acc = row['accuracy_score']
-        sec = row['ball_security_score']
-        pkt = row['pocket_presence_score']
-        
-        elite_dims = sum([mob > 75, agg > 75, acc > 75, sec > 75, pkt > 75])
-        good_dims = sum([mob > 40, agg > 40, acc > 40, sec > 40, pkt > 40])
-        poor_dims = sum([mob < 40, agg < 40, acc < 40, sec < 40, pkt < 40])
-        
-        if elite_dims >= 4:
-            return 'All-Around Superstar'
-        elif elite_dims == 3:
-            return 'Triple-Threat Elite'
-        elif good_dims == 5:
-            return 'Complete All-Around QB'
-        elif good_dims == 4 and poor_dims <= 1:
-            return 'All-Around Threat'
-        elif mob > 75 and agg > 75:
-            return 'Mobile Downfield Attacker'
-        elif mob > 75 and acc > 75:
-            return 'Mobile Precision Passer'
-        elif agg > 75 and acc > 75:
-            return 'Elite Gunslinger'
-        elif acc > 75 and sec > 75:
-            return 'Efficient Ball Protector'
-        elif agg > 75 and pkt > 75:
-            return 'Fearless Deep Shooter'
-        elif mob > 75 and pkt > 75:
-            return 'Dual-Threat Scrambler'
-        elif sec > 75 and pkt > 75:
-            return 'Poised Protector'
-        elif agg > 75 and sec > 75:
-            return 'Aggressive Ball Protector'
-        elif mob > 75 and sec > 75:
-            return 'Mobile Ball Protector'
-        elif acc > 75 and pkt > 75:
-            return 'Accurate Pocket Commander'
-        elif mob > 75 and good_dims < 4:
-            return 'Dynamic Rusher'
-        elif agg > 75 and good_dims < 4:
-            return 'Deep Ball Specialist'
-        elif acc > 75 and good_dims < 4:
-            return 'Precision Passer'
-        elif sec > 75 and good_dims < 4:
-            return 'Safe Ball Handler'
-        elif pkt > 75 and good_dims < 4:
-            return 'Pressure Resistant'
-        elif good_dims >= 3:
-            return 'Well-Rounded Starter'
-        elif poor_dims >= 4:
-            return 'Game Manager'
-        else:
-            return 'Solid Starter'
+    # Ordered (condition, archetype) pairs - first match wins, like an if/elif chain
+    archetype_rules = [
+        (elite_dims >= 4, 'All-Around Superstar'),
+        (elite_dims == 3, 'Triple-Threat Elite'),
+        (good_dims == 5, 'Complete All-Around QB'),
+        ((good_dims == 4) & (poor_dims <= 1), 'All-Around Threat'),
+        (mob & agg, 'Mobile Downfield Attacker'),
+        (mob & acc, 'Mobile Precision Passer'),
+        (agg & acc, 'Elite Gunslinger'),
+        (acc & sec, 'Efficient Ball Protector'),
+        (agg & pkt, 'Fearless Deep Shooter'),
+        (mob & pkt, 'Dual-Threat Scrambler'),
+        (sec & pkt, 'Poised Protector'),
+        (agg & sec, 'Aggressive Ball Protector'),
+        (mob & sec, 'Mobile Ball Protector'),
+        (acc & pkt, 'Accurate Pocket Commander'),
+        (mob & (good_dims < 4), 'Dynamic Rusher'),
+        (agg & (good_dims < 4), 'Deep Ball Specialist'),
+        (acc & (good_dims < 4), 'Precision Passer'),
+        (sec & (good_dims < 4), 'Safe Ball Handler'),
+        (pkt & (good_dims < 4), 'Pressure Resistant'),
+        (good_dims >= 3, 'Well-Rounded Starter'),
+        (poor_dims >= 4, 'Game Manager'),
+    ]
+    custom_archetype = np.select(
+        [cond for cond, _ in archetype_rules],
+        [label for _, label in archetype_rules],
+        default='Solid Starter'
+    )
+    
+    # Assign primary archetype for color coding (dominant dimension, first wins on ties)
+    primary_archetypes = np.array(['Mobile Playmaker', 'Deep Threat', 'Efficient Passer',
+                                   'Ball Protector', 'Quick-Release Specialist'])
+    primary_archetype = primary_archetypes[np.argmax(scores, axis=1)]
     
-    top_30['custom_archetype'] = top_30.apply(assign_custom_archetype, axis=1)
+    # Add team assignments and colors to both df and top_30 (cached with the data)
+    df['team'] = map_by_category(df['passer_player_name'], QB_TEAMS)
+    df['team_color'] = map_by_category(df['team'], NFL_COLORS).fillna('#808080')
+    team = map_by_category(top_30['passer_player_name'], QB_TEAMS)
     
-    # Assign primary archetype for color coding
-    def get_primary_archetype(row):
-        scores = {
-            'Mobile Playmaker': row['mobility_score'],
-            'Deep Threat': row['aggression_score'],
-            'Efficient Passer': row['accuracy_score'],
-            'Ball Protector': row['ball_security_score'],
-            'Quick-Release Specialist': row['pocket_presence_score']
-        }
-        return max(scores, key=scores.get)
+    top_30 = top_30.assign(
+        mobility_raw=mobility_raw,
+        aggression_raw=aggression_raw,
+        accuracy_raw=accuracy_raw,
+        turnover_rate=turnover_rate,
+        **dict(zip(playstyle_dims, scores.T)),
+        # Round qb_rating to 1 decimal
+        qb_rating=top_30['qb_rating'].round(1),
+        custom_archetype=custom_archetype,
+        primary_archetype=primary_archetype,
+        team=team,
+        team_color=map_by_category(team, NFL_COLORS).fillna('#808080'),
+        archetype_color=pd.Series(ARCHETYPE_COLORS).reindex(primary_archetype).fillna('#7f7f7f').to_numpy()
+    )
+    
+    return df, top_30, QB_TEAMS
+
+# Calculate ranking and archetype for each season (cached across reruns)
+@st.cache_data(show_spinner=False)
+def calculate_season_rankings(career_df_full):
+    """Calculate rank and archetype for each QB season"""
+    # Calculate composite score for ranking (using same weights as main model)
+    norm_columns = FEATURE_COLS + ['sack_rate']
     
-    top_30['primary_archetype'] = top_30.apply(get_primary_archetype, axis=1)
+    # Per-season min/max in one grouped pass, gathered back onto every row by season position
+    bounds = career_df_full.groupby('season')[norm_columns].agg(['min', 'max'])
+    season_pos = bounds.index.get_indexer(career_df_full['season'])
+    mins = bounds.xs('min', axis=1, level=1).to_numpy(dtype=np.float64)[season_pos]
+    maxs = bounds.xs('max', axis=1, level=1).to_numpy(dtype=np.float64)[season_pos]
+    X = career_df_full[norm_columns].to_numpy(dtype=np.float64)
+    X_norm = minmax_0_100(X, mins, maxs)
     
-    # Add team assignments to both df and top_30
-    qb_teams = {
-        'J.Allen': 'BUF', 'P.Mahomes': 'KC', 'B.Purdy': 'SF', 'L.Jackson': 'BAL',
-        'J.Hurts': 'PHI', 'J.Burrow': 'CIN', 'J.Goff': 'DET', 'D.Prescott': 'DAL',
-        'J.Love': 'GB', 'T.Tagovailoa': 'MIA', 'J.Daniels': 'WAS', 'M.Stafford': 'LAR',
-        'D.Maye': 'NE', 'T.Brady': 'TB', 'J.Herbert': 'LAC', 'K.Cousins': 'ATL',
-        'J.Garoppolo': 'LV', 'T.Bridgewater': 'DET', 'D.Carr': 'NO', 'G.Smith': 'SEA',
-        'K.Murray': 'ARI', 'A.Rodgers': 'NYJ', 'B.Mayfield': 'TB', 'C.Stroud': 'HOU',
-        'R.Wilson': 'PIT', 'M.Mariota': 'WAS', 'S.Darnold': 'MIN', 'B.Nix': 'DEN',
-        'D.Jones': 'NYG', 'R.Tannehill': 'TEN', 'D.Watson': 'CLE', 'T.Lawrence': 'JAX',
-        'A.Richardson': 'IND', 'C.Williams': 'CHI', 'B.Young': 'CAR', 'W.Levis': 'TEN',
-        'A.O\'Connell': 'NE', 'J.Fields': 'PIT', 'Z.Wilson': 'DEN', 'M.Jones': 'JAX',
-        'K.Pickett': 'PHI', 'D.Lock': 'NYG', 'J.Winston': 'CLE', 'T.Huntley': 'MIA',
-        'C.Rush': 'DAL', 'B.Rypien': 'LAR', 'M.White': 'MIA', 'J.Stidham': 'DEN',
-        'C.McCoy': 'WAS', 'J.Dobbs': 'SF', 'J.Brissett': 'NE', 'T.Heinicke': 'ATL',
-        'J.Flacco': 'IND', 'A.Dalton': 'CAR', 'T.Hill': 'NO', 'M.Glennon': 'NYG',
-        'N.Mullens': 'MIN', 'C.Wentz': 'LAR', 'B.Hoyer': 'LV', 'G.Minshew': 'LV',
-        'T.Siemian': 'CHI', 'J.Johnson': 'BAL', 'C.Hundley': 'ARI', 'S.Howell': 'SEA'
-    }
+    # Invert sack_rate
+    X_norm[:, -1] = 100 - X_norm[:, -1]
     
-    df['team'] = df['passer_player_name'].map(qb_teams)
-    top_30['team'] = top_30['passer_player_name'].map(qb_teams)
+    rankings = career_df_full.copy()
+    rankings['composite_score'] = X_norm @ FEATURE_WEIGHTS
+    
+    # Rank within season
+    rankings['rank'] = rankings.groupby('season')['composite_score'].rank(
+        ascending=False, method='first', na_option='bottom'
+    ).astype(int)
+    
+    return rankings
+
+# Everything Tab 3 needs before a player is picked: parsed once per file, not on every widget change
+@st.cache_data(show_spinner=False)
+def load_career_data(path='qb_rankings_by_season.csv'):
+    """Load per-season rankings with ranks, composite ratings and the list of 3+ season QBs"""
+    career_df = calculate_season_rankings(read_rankings(path))
     
-    return df, top_30, qb_teams
+    # Get list of all QBs with at least 3 seasons
+    season_counts = career_df.groupby('passer_player_name')['season'].transform('size')
+    eligible_qbs = sorted(career_df.loc[season_counts >= 3, 'passer_player_name'].unique())
+    
+    # Filter to qualified QBs for performance metric normalization (300+ attempts)
+    qualified_for_ratings = career_df[career_df['pass_attempts'] >= 300]
+    
+    # Normalize performance metrics to 0-100 across QUALIFIED data only
+    # Sack rate is inverted (lower is better); composite_score becomes the overall rating
+    performance_metrics = ['total_epa_per_play', 'cpoe_mean', 'yards_per_attempt', 'completion_pct', 'td_turnover_ratio']
+    rated_cols = performance_metrics + ['sack_rate', 'composite_score']
+    rating_cols = [f'{col}_rating' for col in performance_metrics] + ['sack_rate_rating', 'overall_rating']
+    
+    # One broadcast over all seven columns against the qualified min/max
+    ratings = minmax_0_100(
+        career_df[rated_cols].to_numpy(dtype=np.float64),
+        qualified_for_ratings[rated_cols].min().to_numpy(dtype=np.float64),
+        qualified_for_ratings[rated_cols].max().to_numpy(dtype=np.float64),
+        invert=np.array([col == 'sack_rate' for col in rated_cols])
+    )
+    return career_df.assign(**dict(zip(rating_cols, ratings.T))), eligible_qbs
+
+# Career table formatting, shared by every year-by-year table in Tab 3
+CAREER_GRADIENT_COLS = [
+    'overall_rating', 'mobility_score', 'aggression_score', 'accuracy_score',
+    'ball_security_score', 'pocket_presence_score',
+    'total_epa_per_play_rating', 'cpoe_mean_rating', 'yards_per_attempt_rating',
+    'completion_pct_rating', 'sack_rate_rating'
+]
+CAREER_TABLE_FORMAT = {'rank': '{:.0f}', **{col: '{:.1f}' for col in CAREER_GRADIENT_COLS}}
+
+def style_career_table(detailed, vmin=None, vmax=None):
+    """Format a career table and color its ratings on a fixed vmin/vmax scale, or per column when omitted"""
+    return detailed.style.format(CAREER_TABLE_FORMAT).background_gradient(
+        subset=CAREER_GRADIENT_COLS, cmap='RdYlGn', vmin=vmin, vmax=vmax
+    )
+
+# CSV bytes for download buttons, reused across reruns while the table is unchanged
+@st.cache_data(show_spinner=False)
+def table_to_csv(table):
+    """Serialize a table for st.download_button (cached on the table's contents)"""
+    return table.to_csv(index=False).encode('utf-8')
+
 # Sidebar for year selection
 st.sidebar.header("Filter Options")
 
@@ -358,27 +663,8 @@ else:
     selected_year = "All Years"
 
 # Title - format the year display nicely
-if selected_year == "All Years":
-    year_display = "2010-2025"
-elif isinstance(selected_year, list):
-    if len(selected_year) == 0:
-        year_display = "2010-2025"
-    elif len(selected_year) == 1:
-        year_display = str(selected_year[0])
-    else:
-        # Convert to integers for comparison
-        years_int = [int(y) if isinstance(y, str) else y for y in selected_year]
-        years_sorted = sorted(years_int)
-        
-        # Check if consecutive
-        if len(years_sorted) == len(range(min(years_sorted), max(years_sorted) + 1)):
-            # Consecutive years
-            year_display = f"{min(years_sorted)}-{max(years_sorted)}"
-        else:
-            # Non-consecutive years
-            year_display = ", ".join(map(str, years_sorted))
-else:
-    year_display = str(selected_year)
+filter_key = season_filter_key(selected_year)
+year_display = format_year_display(filter_key)
 
 title_text = f"🏈 Top 30 NFL Quarterbacks ({year_display})"
 st.title(title_text)
@@ -397,77 +683,28 @@ try:
         st.header("Playstyle Profiles - Top 30 QBs")
         st.markdown("Each QB is scored 0-100 on five dimensions: **Mobility**, **Aggression (Deep Ball)**, **Accuracy (CPOE)**, **Ball Security**, and **Pocket Presence**")
         
-        # Create radar charts in rows of 5
-        categories = ['Mobility', 'Aggression', 'Accuracy', 'Ball Security', 'Pocket Presence']
-        
-        # Color mapping for primary archetypes
-        archetype_colors = {
-            'Mobile Playmaker': '#9467bd',
-            'Deep Threat': '#d62728',
-            'Quick-Release Specialist': '#2ca02c',
-            'Ball Protector': '#1f77b4',
-            'Efficient Passer': '#ff7f0e'
-        }
-        
-        # NFL team colors and team assignments (2024-2025 season)
-        nfl_colors = {
-            'ARI': '#97233F', 'ATL': '#A71930', 'BAL': '#241773', 'BUF': '#00338D',
-            'CAR': '#0085CA', 'CHI': '#C83803', 'CIN': '#FB4F14', 'CLE': '#311D00',
-            'DAL': '#041E42', 'DEN': '#FB4F14', 'DET': '#0076B6', 'GB': '#203731',
-            'HOU': '#03202F', 'IND': '#002C5F', 'JAX': '#006778', 'KC': '#E31837',
-            'LAC': '#0080C6', 'LAR': '#003594', 'LV': '#000000', 'MIA': '#008E97',
-            'MIN': '#4F2683', 'NE': '#002244', 'NO': '#D3BC8D', 'NYG': '#0B2265',
-            'NYJ': '#125740', 'PHI': '#004C54', 'PIT': '#FFB612', 'SEA': '#002244',
-            'SF': '#AA0000', 'TB': '#D50A0A', 'TEN': '#0C2340', 'WAS': '#5A1414'
-        }
-        
-        # Add team colors to top_30
-        top_30['team_color'] = top_30['team'].map(nfl_colors).fillna('#808080')
-        
-        # Display in rows of 5
-        for row in range(6):  # 6 rows for 30 QBs
-            cols = st.columns(5)
-            for col_idx in range(5):
-                qb_idx = row * 5 + col_idx
-                if qb_idx < len(top_30):
-                    qb = top_30.iloc[qb_idx]
-                    
-                    # Create radar chart
-                    values = [
-                        qb['mobility_score'],
-                        qb['aggression_score'],
-                        qb['accuracy_score'],
-                        qb['ball_security_score'],
-                        qb['pocket_presence_score']
-                    ]
-                    
-                    fig = go.Figure()
-                    
-                    fig.add_trace(go.Scatterpolar(
-                        r=values + [values[0]],
-                        theta=categories + [categories[0]],
-                        fill='toself',
-                        line_color=archetype_colors.get(qb['primary_archetype'], '#7f7f7f'),
-                        fillcolor=archetype_colors.get(qb['primary_archetype'], '#7f7f7f'),
-                        opacity=0.6,
-                        name=qb['passer_player_name']
-                    ))
-                    
-                    fig.update_layout(
-                        polar=dict(
-                            radialaxis=dict(visible=True, range=[0, 100], showticklabels=False)
-                        ),
-                        showlegend=False,
-                        title=dict(
-                            text=f"#{int(qb['rank'])} {qb['passer_player_name']}<br><sub>{qb['custom_archetype']}</sub>",
-                            font=dict(size=11)
-                        ),
-                        height=300,
-                        margin=dict(l=60, r=60, t=60, b=60)
-                    )
-                    
-                    with cols[col_idx]:
-                        st.plotly_chart(fig, use_container_width=True)
+        # Create radar charts in rows of 5 (figures come from the cache unless a QB's inputs changed)
+        radar_rows = top_30[[
+            'passer_player_name', 'rank', 'custom_archetype', 'archetype_color',
+            'mobility_score', 'aggression_score', 'accuracy_score',
+            'ball_security_score', 'pocket_presence_score'
+        ]].itertuples(index=False, name=None)
+        
+        for qb_idx, (name, rank, custom_archetype, archetype_color, *values) in enumerate(radar_rows):
+            if qb_idx % 5 == 0:
+                cols = st.columns(5)
+            
+            fig_dict = build_radar_figure(
+                name,
+                tuple(float(v) for v in values),
+                archetype_color,
+                int(rank),
+                custom_archetype,
+                tuple(CATEGORIES)
+            )
+            
+            with cols[qb_idx % 5]:
+                st.plotly_chart(go.Figure(fig_dict), use_container_width=True)
         
         # Section 2: Detailed Table
         st.header("Detailed Statistics - Top 30 QBs")
@@ -522,7 +759,7 @@ try:
         )
         
         # Download button
-        csv = display_df.to_csv(index=False)
+        csv = table_to_csv(display_df)
         st.download_button(
             label="📥 Download Top 30 Data as CSV",
             data=csv,
@@ -536,19 +773,35 @@ try:
         # Create lollipop chart
         fig_lollipop = go.Figure()
         
-        # Add stems with team colors
-        for idx, row in top_30.iterrows():
-            fig_lollipop.add_trace(go.Scatter(
-                x=[0, row['qb_rating']],
-                y=[row['rank'], row['rank']],
+        # Add stems with team colors - one NaN-separated WebGL trace per team color
+        # (a line trace has a single color, so stems are grouped rather than drawn one by one)
+        ratings = top_30['qb_rating'].to_numpy(dtype=np.float64)
+        ranks = top_30['rank'].to_numpy(dtype=np.float64)
+        stem_colors = top_30['team_color'].to_numpy()
+        for color in pd.unique(stem_colors):
+            mask = stem_colors == color
+            stem_x = np.full(3 * mask.sum(), np.nan)
+            stem_y = np.full(3 * mask.sum(), np.nan)
+            stem_x[0::3] = 0
+            stem_x[1::3] = ratings[mask]
+            stem_y[0::3] = ranks[mask]
+            stem_y[1::3] = ranks[mask]
+            fig_lollipop.add_trace(go.Scattergl(
+                x=stem_x,
+                y=stem_y,
                 mode='lines',
-                line=dict(color=row['team_color'], width=3),
+                line=dict(color=color, width=3),
+                connectgaps=False,
                 showlegend=False,
                 hoverinfo='skip'
             ))
         
+        # Hover/tick labels built with vectorized string ops instead of iterrows
+        names_teams = top_30['passer_player_name'].astype(str) + ' (' + top_30['team'].astype(str) + ')'
+        rank_labels = '#' + top_30['rank'].astype(int).astype(str) + ' ' + names_teams
+        
         # Add circles with team colors
-        fig_lollipop.add_trace(go.Scatter(
+        fig_lollipop.add_trace(go.Scattergl(
             x=top_30['qb_rating'],
             y=top_30['rank'],
             mode='markers',
@@ -557,7 +810,7 @@ try:
                 color=top_30['team_color'],
                 line=dict(color='black', width=2)
             ),
-            text=[f"{row['passer_player_name']} ({row['team']})" for _, row in top_30.iterrows()],
+            text=names_teams.tolist(),
             hovertemplate='<b>%{text}</b><br>Rating: %{x:.1f}<extra></extra>',
             showlegend=False
         ))
@@ -570,7 +823,7 @@ try:
                 autorange='reversed',
                 tickmode='array',
                 tickvals=top_30['rank'].tolist(),
-                ticktext=[f"#{int(r['rank'])} {r['passer_player_name']} ({r['team']})" for _, r in top_30.iterrows()],
+                ticktext=rank_labels.tolist(),
                 tickfont=dict(size=10)
             ),
             height=1000,
@@ -588,9 +841,6 @@ try:
         from play-by-play data across the 2010-2025 seasons. Each chart reveals different dimensions of QB effectiveness.
         """)
         
-        # Add team colors to full dataframe for scatter plots
-        df['team_color'] = df['team'].map(nfl_colors).fillna('#808080')
-        
         # Visualization 1: Total EPA vs CPOE
         st.subheader("1️⃣ Total Value Creation vs Accuracy")
         
@@ -620,92 +870,65 @@ try:
         median_epa = df['total_epa_per_play'].median()
         median_cpoe = df['cpoe_mean'].median()
         
-        fig1.add_hline(y=median_epa, line_dash="dash", line_color="gray", opacity=0.5)
-        fig1.add_vline(x=median_cpoe, line_dash="dash", line_color="gray", opacity=0.5)
+        # Add scatter points with team colors: unlabeled WebGL markers for the field,
+        # text labels only for the top 30 (SVG text layout is the expensive part)
+        df_top = df.loc[top_30.index]
+        df_bg = df.drop(index=top_30.index)
+        
+        fig1.add_trace(go.Scattergl(
+            x=df_bg['cpoe_mean'],
+            y=df_bg['total_epa_per_play'],
+            mode='markers',
+            marker=dict(size=6, color=df_bg['team_color'], opacity=0.4),
+            hovertext=df_bg['passer_player_name'],
+            hovertemplate='<b>%{hovertext}</b><br>CPOE: %{x:.2f}<br>Total EPA/Play: %{y:.3f}<extra></extra>',
+            showlegend=False
+        ))
         
-        # Add scatter points with team colors
         fig1.add_trace(go.Scatter(
-            x=df['cpoe_mean'],
-            y=df['total_epa_per_play'],
+            x=df_top['cpoe_mean'],
+            y=df_top['total_epa_per_play'],
             mode='markers+text',
-            marker=dict(size=8, color=df['team_color'], opacity=0.8, line=dict(color='white', width=1)),
-            text=df['passer_player_name'],
+            marker=dict(size=8, color=df_top['team_color'], opacity=0.8, line=dict(color='white', width=1)),
+            text=df_top['passer_player_name'],
             textposition='top center',
-            textfont=dict(size=11, color=df['team_color']),
+            textfont=dict(size=11, color=df_top['team_color']),
             hovertemplate='<b>%{text}</b><br>CPOE: %{x:.2f}<br>Total EPA/Play: %{y:.3f}<extra></extra>',
             showlegend=False
         ))
         
-        # Add quadrant labels
+        # Quadrant lines and labels come from one cached background image
         x_range = df['cpoe_mean'].max() - df['cpoe_mean'].min()
         y_range = df['total_epa_per_play'].max() - df['total_epa_per_play'].min()
-        
-        # Upper-right (Elite)
-        fig1.add_annotation(
-            x=df['cpoe_mean'].max() - x_range*0.02,
-            y=df['total_epa_per_play'].max() - y_range*0.02,
-            text="Elite<br>(High EPA & CPOE)",
-            showarrow=False,
-            bgcolor="rgba(0, 255, 0, 0.2)",
-            bordercolor="green",
-            borderwidth=2,
-            font=dict(size=10, color="darkgreen"),
-            align="right",
-            xanchor="right",
-            yanchor="top"
-        )
-        
-        # Upper-left (High EPA, Low CPOE)
-        fig1.add_annotation(
-            x=df['cpoe_mean'].min() + x_range*0.02,
-            y=df['total_epa_per_play'].max() - y_range*0.02,
-            text="High EPA<br>Lower CPOE",
-            showarrow=False,
-            bgcolor="rgba(255, 255, 0, 0.2)",
-            bordercolor="orange",
-            borderwidth=2,
-            font=dict(size=10, color="darkorange"),
-            align="left",
-            xanchor="left",
-            yanchor="top"
-        )
-        
-        # Lower-right (High CPOE, Low EPA)
-        fig1.add_annotation(
-            x=df['cpoe_mean'].max() - x_range*0.02,
-            y=df['total_epa_per_play'].min() + y_range*0.02,
-            text="High CPOE<br>Lower EPA",
-            showarrow=False,
-            bgcolor="rgba(255, 255, 0, 0.2)",
-            bordercolor="orange",
-            borderwidth=2,
-            font=dict(size=10, color="darkorange"),
-            align="right",
-            xanchor="right",
-            yanchor="bottom"
-        )
-        
-        # Lower-left (Below Average)
-        fig1.add_annotation(
-            x=df['cpoe_mean'].min() + x_range*0.02,
-            y=df['total_epa_per_play'].min() + y_range*0.02,
-            text="Below Average",
-            showarrow=False,
-            bgcolor="rgba(255, 0, 0, 0.2)",
-            bordercolor="red",
-            borderwidth=2,
-            font=dict(size=10, color="darkred"),
-            align="left",
-            xanchor="left",
-            yanchor="bottom"
+        x_bounds = (float(df['cpoe_mean'].min() - x_range*0.05), float(df['cpoe_mean'].max() + x_range*0.05))
+        y_bounds = (float(df['total_epa_per_play'].min() - y_range*0.05), float(df['total_epa_per_play'].max() + y_range*0.05))
+        
+        quadrant_labels = (
+            ("Elite\n(High EPA & CPOE)", 'upper right', (0, 1, 0, 0.2), 'green', 'darkgreen'),
+            ("High EPA\nLower CPOE", 'upper left', (1, 1, 0, 0.2), 'orange', 'darkorange'),
+            ("High CPOE\nLower EPA", 'lower right', (1, 1, 0, 0.2), 'orange', 'darkorange'),
+            ("Below Average", 'lower left', (1, 0, 0, 0.2), 'red', 'darkred'),
         )
+        background = quadrant_background(x_bounds, y_bounds, float(median_cpoe), float(median_epa), quadrant_labels)
         
         fig1.update_layout(
             title="QB Performance: Total EPA vs CPOE",
             xaxis_title="CPOE (Completion % Over Expected)",
             yaxis_title="Total EPA per Play (Passing + Rushing)",
-            height=700,
-            hovermode='closest'
+            xaxis=dict(range=list(x_bounds)),
+            yaxis=dict(range=list(y_bounds)),
+            images=[dict(
+                source=background,
+                xref='x',
+                yref='y',
+                x=x_bounds[0],
+                y=y_bounds[1],
+                sizex=x_bounds[1] - x_bounds[0],
+                sizey=y_bounds[1] - y_bounds[0],
+                sizing='stretch',
+                layer='below'
+            )],
+            **layout_template('scatter')
         )
         
         st.plotly_chart(fig1, use_container_width=True)
@@ -741,100 +964,39 @@ try:
             **Note:** X-axis is inverted so better performance (lower sack rate) appears on the right
             """)
         
-        # Create Sack Rate vs Y/A scatter plot
-        fig2 = go.Figure()
-        
+        # Create Sack Rate vs Y/A scatter plot on top of the cached static decoration
         median_sack = df['sack_rate'].median()
         median_ya = df['yards_per_attempt'].median()
         
-        fig2.add_hline(y=median_ya, line_dash="dash", line_color="gray", opacity=0.5)
-        fig2.add_vline(x=median_sack, line_dash="dash", line_color="gray", opacity=0.5)
+        fig2 = go.Figure(pocket_base_figure(
+            (float(df['sack_rate'].min()), float(df['sack_rate'].max())),
+            (float(df['yards_per_attempt'].min()), float(df['yards_per_attempt'].max())),
+            float(median_sack),
+            float(median_ya)
+        ))
         
-        fig2.add_trace(go.Scatter(
-            x=df['sack_rate'],
-            y=df['yards_per_attempt'],
+        fig2.add_trace(go.Scattergl(
+            x=df_bg['sack_rate'],
+            y=df_bg['yards_per_attempt'],
+            mode='markers',
+            marker=dict(size=6, color=df_bg['team_color'], opacity=0.4),
+            hovertext=df_bg['passer_player_name'],
+            hovertemplate='<b>%{hovertext}</b><br>Sack Rate: %{x:.2f}%<br>Yards/Attempt: %{y:.2f}<extra></extra>',
+            showlegend=False
+        ))
+        
+        fig2.add_trace(go.Scattergl(
+            x=df_top['sack_rate'],
+            y=df_top['yards_per_attempt'],
             mode='markers+text',
-            marker=dict(size=8, color=df['team_color'], opacity=0.8, line=dict(color='white', width=1)),
-            text=df['passer_player_name'],
+            marker=dict(size=8, color=df_top['team_color'], opacity=0.8, line=dict(color='white', width=1)),
+            text=df_top['passer_player_name'],
             textposition='top center',
-            textfont=dict(size=11, color=df['team_color']),
+            textfont=dict(size=11, color=df_top['team_color']),
             hovertemplate='<b>%{text}</b><br>Sack Rate: %{x:.2f}%<br>Yards/Attempt: %{y:.2f}<extra></extra>',
             showlegend=False
         ))
         
-        # Add quadrant labels (note: x-axis is inverted, so positions are reversed)
-        x_range = df['sack_rate'].max() - df['sack_rate'].min()
-        y_range = df['yards_per_attempt'].max() - df['yards_per_attempt'].min()
-        
-        # Upper-left (Elite - low sacks, high Y/A) - appears on right due to inversion
-        fig2.add_annotation(
-            x=df['sack_rate'].min() + x_range*0.02,
-            y=df['yards_per_attempt'].max() - y_range*0.02,
-            text="Elite<br>(Low Sacks, High Y/A)",
-            showarrow=False,
-            bgcolor="rgba(0, 255, 0, 0.2)",
-            bordercolor="green",
-            borderwidth=2,
-            font=dict(size=10, color="darkgreen"),
-            align="left",
-            xanchor="left",
-            yanchor="top"
-        )
-        
-        # Upper-right (High Risk High Reward) - appears on left due to inversion
-        fig2.add_annotation(
-            x=df['sack_rate'].max() - x_range*0.02,
-            y=df['yards_per_attempt'].max() - y_range*0.02,
-            text="High Risk<br>High Reward",
-            showarrow=False,
-            bgcolor="rgba(255, 255, 0, 0.2)",
-            bordercolor="orange",
-            borderwidth=2,
-            font=dict(size=10, color="darkorange"),
-            align="right",
-            xanchor="right",
-            yanchor="top"
-        )
-        
-        # Lower-left (Conservative) - appears on right due to inversion
-        fig2.add_annotation(
-            x=df['sack_rate'].min() + x_range*0.02,
-            y=df['yards_per_attempt'].min() + y_range*0.02,
-            text="Conservative<br>(Low Sacks, Low Y/A)",
-            showarrow=False,
-            bgcolor="rgba(255, 255, 0, 0.2)",
-            bordercolor="orange",
-            borderwidth=2,
-            font=dict(size=10, color="darkorange"),
-            align="left",
-            xanchor="left",
-            yanchor="bottom"
-        )
-        
-        # Lower-right (High Risk Low Reward) - appears on left due to inversion
-        fig2.add_annotation(
-            x=df['sack_rate'].max() - x_range*0.02,
-            y=df['yards_per_attempt'].min() + y_range*0.02,
-            text="High Risk<br>Low Reward",
-            showarrow=False,
-            bgcolor="rgba(255, 0, 0, 0.2)",
-            bordercolor="red",
-            borderwidth=2,
-            font=dict(size=10, color="darkred"),
-            align="right",
-            xanchor="right",
-            yanchor="bottom"
-        )
-        
-        fig2.update_layout(
-            title="QB Pocket Management vs Offensive Output",
-            xaxis_title="Sack Rate (%)",
-            yaxis_title="Yards per Attempt",
-            xaxis=dict(autorange='reversed'),  # Invert x-axis
-            height=700,
-            hovermode='closest'
-        )
-        
         st.plotly_chart(fig2, use_container_width=True)
         
         st.markdown(f"""
@@ -872,32 +1034,20 @@ try:
         
         # Load situational data
         try:
-            situational_df = pd.read_csv('situational_epa_top20.csv')
-            
-            # Apply season filter if not "All Years"
-            if selected_year != "All Years":
-                if isinstance(selected_year, list):
-                    # Filter for multiple years
-                    years = [int(y) if isinstance(y, str) else y for y in selected_year]
-                    situational_df = situational_df[situational_df['season'].isin(years)]
-                else:
-                    # Single year
-                    situational_df = situational_df[situational_df['season'] == int(selected_year)]
+            # Season filter (if not "All Years") is applied while reading
+            situational_df = load_situational(filter_key_seasons(filter_key))
             
             # Get top 20 QBs based on CURRENT filtered rankings (matches year filter)
             # This ensures we show top 20 QBs for the selected year, not overall
-            top_20_names = df.head(20)['passer_player_name'].tolist()
+            top_20_names = top_30['passer_player_name'].head(20).tolist()
             
             # Filter situational data to only include top 20 QBs
             # Only keep QBs that actually appear in the filtered situational data
             available_qbs = situational_df['qb_name'].unique()
             top_20_in_data = [qb for qb in top_20_names if qb in available_qbs]
             
-            situational_df = situational_df[situational_df['qb_name'].isin(top_20_in_data)]
-            
-            # Define column orders for proper left-to-right display
-            field_zone_order = ['Red Zone', 'Scoring Range', 'Midfield', 'Own Territory']
-            score_situation_order = ['Down 2+ Scores', 'Down 4-8', 'Close', 'Up 4-8', 'Up 2+ Scores']
+            # Pivots are cached per (season filter, QB list), so widget reruns reuse them
+            pivots = build_situational_pivots(filter_key, tuple(top_20_in_data))
             
             # Create three heatmaps side by side
             situations = ['down', 'field_zone', 'score_situation']
@@ -911,36 +1061,13 @@ try:
             )
             
             for idx, (situation, label) in enumerate(zip(situations, situation_labels)):
-                # Pivot data for heatmap
-                heatmap_data = situational_df.pivot_table(
-                    index='qb_name',
-                    columns=situation,
-                    values='epa',
-                    aggfunc='mean'
-                )
-                
-                # Reorder columns based on situation type
-                if situation == 'field_zone':
-                    heatmap_data = heatmap_data.reindex(columns=field_zone_order, fill_value=0)
-                elif situation == 'score_situation':
-                    heatmap_data = heatmap_data.reindex(columns=score_situation_order, fill_value=0)
-                
-                # Ensure all available top 20 QBs are in the heatmap (add missing ones with zeros)
-                heatmap_data = heatmap_data.reindex(index=top_20_in_data, fill_value=0)
-                
-                # Reverse order so best QBs at top
-                heatmap_data = heatmap_data.iloc[::-1]
-                
-                # Create heatmap
+                # Create heatmap from the cached z/x/y/text arrays
                 heatmap = go.Heatmap(
-                    z=heatmap_data.values,
-                    x=heatmap_data.columns,
-                    y=heatmap_data.index,
+                    **pivots[situation],
                     colorscale='RdYlGn',
                     zmid=0,
                     zmin=-0.3,
                     zmax=0.3,
-                    text=heatmap_data.values.round(2),
                     texttemplate='%{text}',
                     textfont={"size": 10},
                     colorbar=dict(title="EPA") if idx == 2 else dict(showticklabels=False),
@@ -987,17 +1114,15 @@ try:
             """)
     
     # TAB 3: Career Progression
-    with tab3:
+    # Rendered as a fragment: its player/metric widgets rerun only this tab, not the whole app
+    @st.fragment
+    def render_career_progression():
         st.header("🏈 Career Progression Tracker")
         st.markdown("Analyze how QB performance and playstyle evolved over their careers")
         
         # Load full per-season data for career tracking
         try:
-            career_df = pd.read_csv('qb_rankings_by_season.csv')
-            
-            # Get list of all QBs with at least 3 seasons
-            qb_seasons = career_df.groupby('passer_player_name')['season'].count()
-            eligible_qbs = qb_seasons[qb_seasons >= 3].sort_index().index.tolist()
+            career_df_with_ranks, eligible_qbs = load_career_data('qb_rankings_by_season.csv')
             
             # Player selection
             col1, col2 = st.columns(2)
@@ -1023,12 +1148,6 @@ try:
                 else:
                     player2 = None
             
-            # Get data for selected player(s)
-            p1_data = career_df[career_df['passer_player_name'] == player1].sort_values('season')
-            
-            if player2:
-                p2_data = career_df[career_df['passer_player_name'] == player2].sort_values('season')
-            
             # Calculate playstyle dimensions for each season (normalized to 0-100)
             def calculate_playstyle_scores(df_subset, df_full):
                 """Calculate normalized playstyle scores (0-100 scale) using PER-SEASON normalization"""
@@ -1037,13 +1156,14 @@ try:
                 # Filter normalization pool to remove low-volume outliers
                 # Use 300 pass attempts for qualified passers (or 120 for current year 2025)
                 # Dynamic threshold: lower for incomplete seasons
-                def get_min_attempts(season):
-                    return 120 if season == 2025 else 300
+                min_attempts = np.where(df_full['season'].to_numpy() == 2025, 120, 300)
                 
                 # Apply threshold per season in the pool
-                qualified_pool = df_full[
-                    df_full.apply(lambda row: row['pass_attempts'] >= get_min_attempts(row['season']), axis=1)
-                ].copy()
+                qualified_pool = df_full.loc[df_full['pass_attempts'].to_numpy() >= min_attempts].copy()
+                
+                # Pool-side rates, computed once for all seasons
+                qualified_pool['rush_ypg'] = qualified_pool['rushing_yards'] / qualified_pool['total_games']
+                qualified_pool['to_rate'] = ((qualified_pool['interceptions'] + qualified_pool['fumbles_lost']) / qualified_pool['total_plays']) * 100
                 
                 # Calculate raw metrics first
                 scores['mobility_raw'] = scores['rushing_yards'] / scores['total_games']
@@ -1054,194 +1174,43 @@ try:
                 # ALL DIMENSIONS NOW USE PER-SEASON NORMALIZATION (matching First Page when filtered)
                 # This compares QBs to their contemporaries in each season
                 
+                def season_normalize(raw, pool, metric, invert=False):
+                    """Scale `raw` to 0-100 against each season's pool min/max (50 if a season can't be normalized)."""
+                    bounds = pool.groupby('season')[metric].agg(['min', 'max', 'size'])
+                    bounds = bounds[bounds['size'] > 1]
+                    lo = scores['season'].map(bounds['min']).to_numpy(dtype=np.float64)
+                    hi = scores['season'].map(bounds['max']).to_numpy(dtype=np.float64)
+                    return minmax_0_100(raw.to_numpy(dtype=np.float64), lo, hi, invert=invert)
+                
                 # Mobility - PER-SEASON normalization with 20+ rush attempts
-                mobility_scores = []
-                for idx, row in scores.iterrows():
-                    season_pool = qualified_pool[
-                        (qualified_pool['season'] == row['season']) & 
-                        (qualified_pool['rush_attempts'] >= 20)
-                    ].copy()
-                    if len(season_pool) > 1:
-                        season_pool['rush_ypg'] = season_pool['rushing_yards'] / season_pool['total_games']
-                        min_mob = season_pool['rush_ypg'].min()
-                        max_mob = season_pool['rush_ypg'].max()
-                        if max_mob > min_mob:
-                            mob_score = 100 * (row['mobility_raw'] - min_mob) / (max_mob - min_mob)
-                            mobility_scores.append(max(0, min(100, mob_score)))
-                        else:
-                            mobility_scores.append(50)
-                    else:
-                        mobility_scores.append(50)
-                scores['mobility_score'] = mobility_scores
+                mobility_pool = qualified_pool[qualified_pool['rush_attempts'] >= 20]
+                scores['mobility_score'] = season_normalize(scores['mobility_raw'], mobility_pool, 'rush_ypg')
                 
                 # Aggression - PER-SEASON normalization
-                aggression_scores = []
-                for idx, row in scores.iterrows():
-                    season_pool = qualified_pool[qualified_pool['season'] == row['season']].copy()
-                    if len(season_pool) > 1:
-                        min_agg = season_pool['yards_per_attempt'].min()
-                        max_agg = season_pool['yards_per_attempt'].max()
-                        if max_agg > min_agg:
-                            agg_score = 100 * (row['aggression_raw'] - min_agg) / (max_agg - min_agg)
-                            aggression_scores.append(max(0, min(100, agg_score)))
-                        else:
-                            aggression_scores.append(50)
-                    else:
-                        aggression_scores.append(50)
-                scores['aggression_score'] = aggression_scores
+                scores['aggression_score'] = season_normalize(scores['aggression_raw'], qualified_pool, 'yards_per_attempt')
                 
                 # Accuracy - PER-SEASON normalization
-                accuracy_scores = []
-                for idx, row in scores.iterrows():
-                    season_pool = qualified_pool[qualified_pool['season'] == row['season']].copy()
-                    if len(season_pool) > 1:
-                        min_acc = season_pool['cpoe_mean'].min()
-                        max_acc = season_pool['cpoe_mean'].max()
-                        if max_acc > min_acc:
-                            acc_score = 100 * (row['accuracy_raw'] - min_acc) / (max_acc - min_acc)
-                            accuracy_scores.append(max(0, min(100, acc_score)))
-                        else:
-                            accuracy_scores.append(50)
-                    else:
-                        accuracy_scores.append(50)
-                scores['accuracy_score'] = accuracy_scores
+                scores['accuracy_score'] = season_normalize(scores['accuracy_raw'], qualified_pool, 'cpoe_mean')
                 
                 # Ball Security - PER-SEASON normalization (inverted turnover rate)
-                ball_security_scores = []
-                for idx, row in scores.iterrows():
-                    season_pool = qualified_pool[qualified_pool['season'] == row['season']].copy()
-                    if len(season_pool) > 1:
-                        season_pool['to_rate'] = ((season_pool['interceptions'] + season_pool['fumbles_lost']) / season_pool['total_plays']) * 100
-                        min_to = season_pool['to_rate'].min()
-                        max_to = season_pool['to_rate'].max()
-                        if max_to > min_to:
-                            sec_score = 100 - (100 * (row['turnover_rate'] - min_to) / (max_to - min_to))
-                            ball_security_scores.append(max(0, min(100, sec_score)))
-                        else:
-                            ball_security_scores.append(50)
-                    else:
-                        ball_security_scores.append(50)
-                scores['ball_security_score'] = ball_security_scores
+                scores['ball_security_score'] = season_normalize(scores['turnover_rate'], qualified_pool, 'to_rate', invert=True)
                 
                 # Pocket Presence - PER-SEASON normalization (inverted sack rate)
-                pocket_scores = []
-                for idx, row in scores.iterrows():
-                    season_pool = qualified_pool[qualified_pool['season'] == row['season']].copy()
-                    if len(season_pool) > 1:
-                        min_sack = season_pool['sack_rate'].min()
-                        max_sack = season_pool['sack_rate'].max()
-                        if max_sack > min_sack:
-                            pkt_score = 100 - (100 * (row['sack_rate'] - min_sack) / (max_sack - min_sack))
-                            pocket_scores.append(max(0, min(100, pkt_score)))
-                        else:
-                            pocket_scores.append(50)
-                    else:
-                        pocket_scores.append(50)
-                scores['pocket_presence_score'] = pocket_scores
+                scores['pocket_presence_score'] = season_normalize(scores['sack_rate'], qualified_pool, 'sack_rate', invert=True)
                 
                 return scores
             
-            p1_scores = calculate_playstyle_scores(p1_data, career_df)
-            if player2:
-                p2_scores = calculate_playstyle_scores(p2_data, career_df)
-            
             # Section 1: Comprehensive Year-by-Year Statistics Table (MOVED TO TOP)
             st.subheader("📊 Comprehensive Year-by-Year Statistics")
             
-            # Calculate ranking and archetype for each season
-            def calculate_season_rankings(career_df_full):
-                """Calculate rank and archetype for each QB season"""
-                rankings_list = []
-                
-                for season in career_df_full['season'].unique():
-                    season_data = career_df_full[career_df_full['season'] == season].copy()
-                    
-                    # Calculate composite score for ranking (using same weights as main model)
-                    feature_columns = ['total_epa_per_play', 'cpoe_mean', 'yards_per_attempt', 
-                                      'td_turnover_ratio', 'completion_pct']
-                    
-                    X_norm = season_data[feature_columns].copy()
-                    for col in feature_columns:
-                        min_val = season_data[col].min()
-                        max_val = season_data[col].max()
-                        if max_val > min_val:
-                            X_norm[col] = 100 * (season_data[col] - min_val) / (max_val - min_val)
-                        else:
-                            X_norm[col] = 50
-                    
-                    # Invert sack_rate
-                    min_val = season_data['sack_rate'].min()
-                    max_val = season_data['sack_rate'].max()
-                    if max_val > min_val:
-                        X_norm['sack_rate_inv'] = 100 - (100 * (season_data['sack_rate'] - min_val) / (max_val - min_val))
-                    else:
-                        X_norm['sack_rate_inv'] = 50
-                    
-                    # Calculate composite score
-                    feature_weights = {
-                        'total_epa_per_play': 0.25,
-                        'cpoe_mean': 0.15,
-                        'yards_per_attempt': 0.12,
-                        'td_turnover_ratio': 0.11,
-                        'completion_pct': 0.09,
-                        'sack_rate_inv': 0.05
-                    }
-                    
-                    season_data['composite_score'] = sum(
-                        X_norm[col] * feature_weights[col] 
-                        for col in feature_weights.keys()
-                    )
-                    
-                    # Rank within season
-                    season_data = season_data.sort_values('composite_score', ascending=False)
-                    season_data['rank'] = range(1, len(season_data) + 1)
-                    
-                    rankings_list.append(season_data)
-                
-                return pd.concat(rankings_list, ignore_index=True)
-            
-            # Calculate rankings for all seasons
-            career_df_with_ranks = calculate_season_rankings(career_df)
-            
-            # Filter to qualified QBs for performance metric normalization (300+ attempts)
-            qualified_for_ratings = career_df_with_ranks[career_df_with_ranks['pass_attempts'] >= 300].copy()
-            
-            # Normalize performance metrics to 0-100 across QUALIFIED data only
-            performance_metrics = ['total_epa_per_play', 'cpoe_mean', 'yards_per_attempt', 'completion_pct', 'td_turnover_ratio']
-            
-            for metric in performance_metrics:
-                min_val = qualified_for_ratings[metric].min()
-                max_val = qualified_for_ratings[metric].max()
-                if max_val > min_val:
-                    career_df_with_ranks[f'{metric}_rating'] = 100 * (career_df_with_ranks[metric] - min_val) / (max_val - min_val)
-                    career_df_with_ranks[f'{metric}_rating'] = career_df_with_ranks[f'{metric}_rating'].clip(0, 100)
-                else:
-                    career_df_with_ranks[f'{metric}_rating'] = 50
-            
-            # Normalize sack_rate (inverted - lower is better)
-            min_val = qualified_for_ratings['sack_rate'].min()
-            max_val = qualified_for_ratings['sack_rate'].max()
-            if max_val > min_val:
-                career_df_with_ranks['sack_rate_rating'] = 100 - (100 * (career_df_with_ranks['sack_rate'] - min_val) / (max_val - min_val))
-                career_df_with_ranks['sack_rate_rating'] = career_df_with_ranks['sack_rate_rating'].clip(0, 100)
-            else:
-                career_df_with_ranks['sack_rate_rating'] = 50
-            
-            # Normalize composite_score to 0-100 for overall rating
-            min_score = qualified_for_ratings['composite_score'].min()
-            max_score = qualified_for_ratings['composite_score'].max()
-            if max_score > min_score:
-                career_df_with_ranks['overall_rating'] = 100 * (career_df_with_ranks['composite_score'] - min_score) / (max_score - min_score)
-                career_df_with_ranks['overall_rating'] = career_df_with_ranks['overall_rating'].clip(0, 100)
-            else:
-                career_df_with_ranks['overall_rating'] = 50
-            
             # Get ranked data for selected players
             p1_data_ranked = career_df_with_ranks[career_df_with_ranks['passer_player_name'] == player1].sort_values('season')
+            p1_data = p1_data_ranked
             if player2:
                 p2_data_ranked = career_df_with_ranks[career_df_with_ranks['passer_player_name'] == player2].sort_values('season')
+                p2_data = p2_data_ranked
             
-            # Recalculate scores with ranked data (pass career_df_with_ranks for normalization)
+            # Score playstyle on the ranked data (pass career_df_with_ranks for normalization)
             p1_scores = calculate_playstyle_scores(p1_data_ranked, career_df_with_ranks)
             if player2:
                 p2_scores = calculate_playstyle_scores(p2_data_ranked, career_df_with_ranks)
@@ -1261,19 +1230,14 @@ try:
                 # Add team placeholder (you can enhance this with actual team data if available)
                 detailed['team'] = 'N/A'  # Placeholder - would need team data by season
                 
-                # Simple archetype based on dominant playstyle
-                def assign_archetype(row):
-                    scores = {
-                        'Mobility': row['mobility_score'],
-                        'Aggression': row['aggression_score'],
-                        'Accuracy': row['accuracy_score'],
-                        'Ball Security': row['ball_security_score'],
-                        'Pocket Presence': row['pocket_presence_score']
-                    }
-                    max_dim = max(scores, key=scores.get)
-                    return f"{max_dim} Specialist"
-                
-                detailed['archetype'] = detailed.apply(assign_archetype, axis=1)
+                # Simple archetype based on dominant playstyle (first dimension wins on ties)
+                score_cols = ['mobility_score', 'aggression_score', 'accuracy_score',
+                              'ball_security_score', 'pocket_presence_score']
+                dimension_names = np.array(['Mobility', 'Aggression', 'Accuracy',
+                                            'Ball Security', 'Pocket Presence'])
+                detailed['archetype'] = np.char.add(
+                    dimension_names[detailed[score_cols].to_numpy().argmax(axis=1)], ' Specialist'
+                )
                 
                 # Overall rating already calculated above (normalized composite_score)
                 # Now select rating columns instead of raw stats
@@ -1296,36 +1260,21 @@ try:
             if player2:
                 p2_detailed = prepare_detailed_table(p2_data_ranked, p2_scores)
                 
+                # One color scale across both players so the gradients are comparable
+                ratings = pd.concat([p1_detailed[CAREER_GRADIENT_COLS], p2_detailed[CAREER_GRADIENT_COLS]])
+                vmin, vmax = ratings.min().min(), ratings.max().max()
+                
                 # Side-by-side comparison
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     st.markdown(f"### {player1}")
-                    styled_p1 = p1_detailed.style.format({
-                        'rank': '{:.0f}',
-                        'overall_rating': '{:.1f}',
-                        'mobility_score': '{:.1f}',
-                        'aggression_score': '{:.1f}',
-                        'accuracy_score': '{:.1f}',
-                        'ball_security_score': '{:.1f}',
-                        'pocket_presence_score': '{:.1f}',
-                        'total_epa_per_play_rating': '{:.1f}',
-                        'cpoe_mean_rating': '{:.1f}',
-                        'yards_per_attempt_rating': '{:.1f}',
-                        'completion_pct_rating': '{:.1f}',
-                        'sack_rate_rating': '{:.1f}'
-                    }).background_gradient(
-                        subset=['overall_rating', 'mobility_score', 'aggression_score', 'accuracy_score',
-                               'ball_security_score', 'pocket_presence_score',
-                               'total_epa_per_play_rating', 'cpoe_mean_rating', 'yards_per_attempt_rating',
-                               'completion_pct_rating', 'sack_rate_rating'],
-                        cmap='RdYlGn'
-                    )
+                    styled_p1 = style_career_table(p1_detailed, vmin, vmax)
                     
                     st.dataframe(styled_p1, hide_index=True, use_container_width=True, height=400)
                     
                     # Download button for player 1
-                    csv1 = p1_detailed.to_csv(index=False)
+                    csv1 = table_to_csv(p1_detailed)
                     st.download_button(
                         label=f"📥 Download {player1} Data",
                         data=csv1,
@@ -1336,31 +1285,12 @@ try:
                 
                 with col2:
                     st.markdown(f"### {player2}")
-                    styled_p2 = p2_detailed.style.format({
-                        'rank': '{:.0f}',
-                        'overall_rating': '{:.1f}',
-                        'mobility_score': '{:.1f}',
-                        'aggression_score': '{:.1f}',
-                        'accuracy_score': '{:.1f}',
-                        'ball_security_score': '{:.1f}',
-                        'pocket_presence_score': '{:.1f}',
-                        'total_epa_per_play_rating': '{:.1f}',
-                        'cpoe_mean_rating': '{:.1f}',
-                        'yards_per_attempt_rating': '{:.1f}',
-                        'completion_pct_rating': '{:.1f}',
-                        'sack_rate_rating': '{:.1f}'
-                    }).background_gradient(
-                        subset=['overall_rating', 'mobility_score', 'aggression_score', 'accuracy_score',
-                               'ball_security_score', 'pocket_presence_score',
-                               'total_epa_per_play_rating', 'cpoe_mean_rating', 'yards_per_attempt_rating',
-                               'completion_pct_rating', 'sack_rate_rating'],
-                        cmap='RdYlGn'
-                    )
+                    styled_p2 = style_career_table(p2_detailed, vmin, vmax)
                     
                     st.dataframe(styled_p2, hide_index=True, use_container_width=True, height=400)
                     
                     # Download button for player 2
-                    csv2 = p2_detailed.to_csv(index=False)
+                    csv2 = table_to_csv(p2_detailed)
                     st.download_button(
                         label=f"📥 Download {player2} Data",
                         data=csv2,
@@ -1372,31 +1302,12 @@ try:
                 # Single player - full width
                 st.markdown(f"### {player1} - Complete Career Statistics")
                 
-                styled_p1 = p1_detailed.style.format({
-                    'rank': '{:.0f}',
-                    'overall_rating': '{:.1f}',
-                    'mobility_score': '{:.1f}',
-                    'aggression_score': '{:.1f}',
-                    'accuracy_score': '{:.1f}',
-                    'ball_security_score': '{:.1f}',
-                    'pocket_presence_score': '{:.1f}',
-                    'total_epa_per_play_rating': '{:.1f}',
-                    'cpoe_mean_rating': '{:.1f}',
-                    'yards_per_attempt_rating': '{:.1f}',
-                    'completion_pct_rating': '{:.1f}',
-                    'sack_rate_rating': '{:.1f}'
-                }).background_gradient(
-                    subset=['overall_rating', 'mobility_score', 'aggression_score', 'accuracy_score',
-                           'ball_security_score', 'pocket_presence_score',
-                           'total_epa_per_play_rating', 'cpoe_mean_rating', 'yards_per_attempt_rating',
-                           'completion_pct_rating', 'sack_rate_rating'],
-                    cmap='RdYlGn'
-                )
+                styled_p1 = style_career_table(p1_detailed)
                 
                 st.dataframe(styled_p1, hide_index=True, use_container_width=True, height=600)
                 
                 # Download button
-                csv1 = p1_detailed.to_csv(index=False)
+                csv1 = table_to_csv(p1_detailed)
                 st.download_button(
                     label=f"📥 Download {player1} Career Data",
                     data=csv1,
@@ -1489,9 +1400,7 @@ try:
                 title=f"{metric_choice} by Season",
                 xaxis_title="Season",
                 yaxis_title=metric_choice,
-                height=400,
-                hovermode='x unified',
-                showlegend=True
+                **layout_template('career_line')
             )
             
             st.plotly_chart(fig_metric, use_container_width=True)
@@ -1547,9 +1456,7 @@ try:
                 title=f"{playstyle_metric} by Season",
                 xaxis_title="Season",
                 yaxis_title=playstyle_metric,
-                height=400,
-                hovermode='x unified',
-                showlegend=True
+                **layout_template('career_line')
             )
             
             st.plotly_chart(fig_style, use_container_width=True)
@@ -1583,6 +1490,9 @@ try:
         except Exception as e:
             st.error(f"Error loading career data: {str(e)}")
     
+    with tab3:
+        render_career_progression()
+    
     # Footer
     st.markdown("---")
     st.markdown("""